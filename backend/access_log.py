@@ -0,0 +1,238 @@
+"""Structured JSON logging and per-request access logs.
+
+Every log record is written as one JSON line by a QueueListener thread; the
+event loop only puts records on a queue, so a slow stderr or log shipper never
+stalls request handling. AccessLogMiddleware times each request and counts
+the Mongo commands it issued (recorded by database.CommandRecorder). It then
+logs:
+
+- every failed request (status >= 400), with the exception a handler
+  flattened into an HTTPException, if any
+- every request slower than SLOW_REQUEST_MS, with its Mongo command list
+- a LOG_SAMPLE_RATE fraction of the remaining, successful requests
+
+Run uvicorn with --no-access-log to avoid logging each request twice.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+from fastapi.exception_handlers import http_exception_handler
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Commands kept per request for slow-request logs; all of them are counted
+MAX_RECORDED_COMMANDS = 100
+
+logger = logging.getLogger("access")
+
+_current: contextvars.ContextVar[Optional["RequestStats"]] = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """What one request did, filled in while it runs.
+
+    Motor runs commands on its executor threads with a copy of the request's
+    context, so the command callbacks append here from those threads.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.db_ops = 0
+        self.commands: List[dict] = []
+        self._pending = {}
+        self.error = None
+
+    def command_started(self, operation_id: int, name: str, collection: Optional[str]):
+        self.db_ops += 1
+        if len(self.commands) < MAX_RECORDED_COMMANDS:
+            command = {"command": name, "collection": collection}
+            self.commands.append(command)
+            self._pending[operation_id] = command
+
+    def command_finished(self, operation_id: int, duration_ms: float, failure: Optional[str] = None):
+        command = self._pending.pop(operation_id, None)
+        if command is not None:
+            command["durationMs"] = round(duration_ms, 3)
+            if failure is not None:
+                command["failure"] = failure
+
+
+def current_request() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def tracking(request_id: str):
+    """Attribute the commands issued inside this block to a new RequestStats"""
+    stats = RequestStats(request_id)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["requestId"] = request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    """Stamps records with the current request, while still on its task"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        stats = _current.get()
+        record.request_id = stats.request_id if stats is not None else None
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler would format the message (and traceback) here, on the
+        # event loop; the queue never leaves the process, so the listener
+        # thread can do it instead
+        return record
+
+
+@contextlib.contextmanager
+def structured_logging(level: str = "INFO"):
+    """Route all logging through a queue to a JSON writer thread while active"""
+    log_queue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(_RequestIdFilter())
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, output)
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(handler)
+    listener.start()
+    try:
+        yield
+    finally:
+        root.removeHandler(handler)
+        listener.stop()
+
+
+class AccessLogger:
+    """Decides which requests to log and what to include"""
+
+    def __init__(self, sample_rate: float = 1.0, slow_request_ms: float = 500.0):
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+
+    def log(self, scope, stats: RequestStats, status: int, duration_ms: float):
+        slow = duration_ms >= self.slow_request_ms
+        if status < 400 and not slow and random.random() >= self.sample_rate:
+            return
+
+        route = scope.get("route")
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status,
+            "durationMs": round(duration_ms, 3),
+            "dbOps": stats.db_ops,
+        }
+        if slow:
+            fields["slow"] = True
+            fields["commands"] = stats.commands
+        if status >= 500:
+            level = logging.ERROR
+        elif slow:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        logger.log(
+            level,
+            "%s %s %s",
+            scope["method"],
+            scope["path"],
+            status,
+            exc_info=stats.error,
+            extra={"fields": fields},
+        )
+
+
+class AccessLogMiddleware:
+    """ASGI middleware timing each request for the app's AccessLogger.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which would run every request
+    through an extra task and memory stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append(REQUEST_ID_HEADER, request_id)
+            await send(message)
+
+        with tracking(request_id) as stats:
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            except Exception:
+                stats.error = sys.exc_info()
+                raise
+            finally:
+                duration_ms = (time.perf_counter() - started) * 1000
+                scope["app"].state.access_log.log(scope, stats, status, duration_ms)
+
+
+def _request_id(scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            # Kept from the caller (e.g. a proxy) so logs can be correlated
+            return value.decode("latin-1")[:128]
+    return uuid.uuid4().hex
+
+
+async def record_flattened_error(request, exc: StarletteHTTPException):
+    """HTTPException handler keeping the error a route turned into a 4xx.
+
+    Routes answer unexpected failures with HTTPException(400, str(e)); the
+    original exception is its __context__, attached here to the access log.
+    """
+    cause = exc.__context__
+    stats = _current.get()
+    if stats is not None and cause is not None and not isinstance(cause, StarletteHTTPException):
+        stats.error = (type(cause), cause, cause.__traceback__)
+    return await http_exception_handler(request, exc)
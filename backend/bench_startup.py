@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Worker startup benchmark.
+
+Starts the app in a fresh interpreter under `python -X importtime`, the way a
+uvicorn worker does before serving its first request: import `server`, build
+the app with create_app() and run its lifespan (which imports the Mongo
+driver, opens the pool and creates indexes) until the app is ready. Reports
+the slowest imports and the wall-clock time of each phase, and fails if the
+total exceeds the budget, the app did not warm up, or any heavy optional
+package ends up in the import graph.
+
+    python bench_startup.py [--mongo-url URL | --in-memory] [--budget-ms 1000] [--top 15]
+
+--in-memory injects a mongomock-motor client, for machines without a mongod;
+mongomock is then imported (and timed) as part of startup.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+# Installed via requirements.txt but must never be imported on the startup path
+HEAVY_MODULES = ["pandas", "numpy", "boto3", "botocore", "jose", "emergentintegrations"]
+
+STARTUP_SNIPPET = """
+import time
+started = time.perf_counter()
+import asyncio
+import json
+import sys
+
+import server
+from settings import Settings
+
+imported = time.perf_counter()
+
+
+async def start():
+    mongo_url, timeout_ms, in_memory = sys.argv[1], int(sys.argv[2]), sys.argv[3] == "1"
+    client = None
+    if in_memory:
+        from mongomock_motor import AsyncMongoMockClient
+
+        client = AsyncMongoMockClient()
+    settings = Settings(mongo_url=mongo_url, db_name="bench", mongo_server_selection_timeout_ms=timeout_ms)
+    app = server.create_app(settings, mongo_client=client)
+    created = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        return app.state.warmed_up, created, ready
+
+warmed_up, created, ready = asyncio.run(start())
+print(json.dumps({
+    "importMs": (imported - started) * 1000,
+    "createAppMs": (created - imported) * 1000,
+    "lifespanMs": (ready - created) * 1000,
+    "warmedUp": warmed_up,
+}))
+"""
+
+
+def run_startup(mongo_url: str, timeout_ms: int, in_memory: bool):
+    """Run the startup snippet in a fresh interpreter; returns (timings, importtime lines)"""
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGO_URL", "DB_NAME")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SNIPPET, mongo_url, str(timeout_ms), "1" if in_memory else "0"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr.splitlines()
+
+
+def parse_importtime(lines):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) tuples"""
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit():
+            continue  # header row
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="fail above this time to ready")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of a mongod")
+    parser.add_argument("--server-selection-timeout-ms", type=int, default=2000,
+                        help="how long warm-up waits for an unreachable mongod")
+    args = parser.parse_args()
+
+    timings, lines = run_startup(args.mongo_url, args.server_selection_timeout_ms, args.in_memory)
+    modules = parse_importtime(lines)
+    imported = {name for name, _, _ in modules}
+    elapsed_ms = timings["importMs"] + timings["createAppMs"] + timings["lifespanMs"]
+
+    print(f"📦 {len(modules)} modules imported")
+    print(f"⏱️  import server: {timings['importMs']:.1f}ms, create_app(): {timings['createAppMs']:.1f}ms, "
+          f"lifespan: {timings['lifespanMs']:.1f}ms")
+    print(f"⏱️  ready after {elapsed_ms:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    print("=" * 60)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    top_level = [m for m in modules if "." not in m[0]]
+    for name, self_us, cumulative_us in sorted(top_level, key=lambda m: -m[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    print("=" * 60)
+
+    success = True
+    if not timings["warmedUp"]:
+        print("❌ Warm-up failed (is MongoDB reachable?); the time includes the server-selection timeout")
+        success = False
+    heavy = sorted(m for m in HEAVY_MODULES if m in imported)
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        success = False
+    if elapsed_ms > args.budget_ms:
+        print(f"❌ Startup took {elapsed_ms:.1f}ms, over the {args.budget_ms:.0f}ms budget")
+        success = False
+    if success:
+        print("🎉 Startup is within budget")
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Cross-worker cache invalidation from MongoDB change streams.
+
+Used when COURSE_CACHE=watch: every worker tails the change stream for the
+`courses` and `attendance` collections and drops the affected entries from its
+CourseCache, so a write handled by one worker is seen by all of them. Change
+streams need a replica set (a single-node one is enough); against a standalone
+mongod, start() fails so the app does not come up with the cache quietly off.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from course_cache import CourseCache
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ["courses", "attendance"]
+
+# Events that make the whole namespace unreliable rather than one document
+NAMESPACE_EVENTS = {"drop", "rename", "dropDatabase", "invalidate"}
+
+# OperationFailure code for "$changeStream is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+# Reconnect delays double from retry_delay_s up to this
+MAX_RETRY_DELAY_S = 60.0
+
+
+class CacheInvalidator:
+    """Tails the change stream and applies each event to a CourseCache.
+
+    While the stream is down the cache is disabled (reads go straight to
+    Mongo); it is cleared and re-enabled once the stream has been reopened.
+    """
+
+    def __init__(self, db, cache: CourseCache, retry_delay_s: float = 1.0):
+        self.db = db
+        self.cache = cache
+        self.retry_delay_s = retry_delay_s
+        self.resume_token = None
+        self._stream = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Open the stream before returning, so no write after startup is missed"""
+        try:
+            await self._open()
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                raise RuntimeError(
+                    "COURSE_CACHE=watch needs MongoDB change streams, which this server does not "
+                    "support (it is not a replica set); use COURSE_CACHE=off or a replica set"
+                ) from e
+            logger.exception("Could not open the course cache change stream")
+            self.cache.enabled = False
+        except PyMongoError:
+            # Keep serving without the cache; _run() retries the stream
+            logger.exception("Could not open the course cache change stream")
+            self.cache.enabled = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._close()
+
+    async def _open(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": WATCHED_COLLECTIONS},
+            # See apply(): attendance deletes need no invalidation of their own
+            "$nor": [{"ns.coll": "attendance", "operationType": "delete"}],
+        }}]
+        try:
+            stream = self.db.watch(pipeline, full_document="updateLookup", resume_after=self.resume_token)
+            self._stream = await stream.__aenter__()
+        except OperationFailure:
+            if self.resume_token is None:
+                raise
+            # The resume point fell off the oplog; start over from now
+            logger.warning("Change stream could not resume, reopening from the current time")
+            self.resume_token = None
+            stream = self.db.watch(pipeline, full_document="updateLookup")
+            self._stream = await stream.__aenter__()
+        self.cache.invalidate()
+        self.cache.enabled = True
+
+    async def _close(self):
+        if self._stream is not None:
+            stream, self._stream = self._stream, None
+            try:
+                await stream.close()
+            except PyMongoError:
+                pass
+
+    async def _run(self):
+        failures = 0
+        while True:
+            try:
+                if self._stream is None:
+                    await self._open()
+                    failures = 0
+                async for change in self._stream:
+                    self.apply(change)
+                    self.resume_token = self._stream.resume_token
+                # The stream ended (e.g. after an "invalidate" event)
+                self.resume_token = None
+                await self._close()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                # Traceback once per outage, not on every retry
+                if failures == 0:
+                    logger.exception("Course cache change stream failed; bypassing the cache until it reconnects")
+                else:
+                    logger.warning("Course cache change stream still down (%s attempts): %s", failures + 1, e)
+                self.cache.enabled = False
+                self.cache.invalidate()
+                await self._close()
+                if isinstance(e, OperationFailure) and e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.error("Change streams are not supported by this server; the course cache stays off")
+                    return
+                await asyncio.sleep(min(self.retry_delay_s * 2 ** failures, MAX_RETRY_DELAY_S))
+                failures += 1
+
+    def apply(self, change: dict):
+        """Invalidate whatever cached state the change event affects"""
+        operation = change.get("operationType")
+        if operation in NAMESPACE_EVENTS:
+            self.cache.invalidate()
+            return
+
+        collection = change.get("ns", {}).get("coll")
+        if collection == "courses":
+            self.cache.invalidate(str(change["documentKey"]["_id"]))
+        elif collection == "attendance":
+            # Deletes carry only the attendance _id, so the owning course is
+            # unknown; they are skipped because every one is accompanied by a
+            # `courses` event (the counter update, or the course's own delete
+            # when purge.py removes its history), which invalidates that course
+            if operation == "delete":
+                return
+            full_document = change.get("fullDocument") or {}
+            course_id = full_document.get("courseId")
+            self.cache.invalidate(str(course_id) if course_id is not None else None)
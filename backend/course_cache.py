@@ -0,0 +1,48 @@
+"""In-process cache of course responses.
+
+Only correct while every write goes through this process ("local" mode) or
+while a change stream keeps it in sync with the other workers ("watch" mode,
+see change_streams.py).
+"""
+from typing import Dict, List, Optional
+
+CACHE_MODES = ("off", "local", "watch")
+
+
+class CourseCache:
+    """Caches the formatted course list and individual courses.
+
+    Reads capture `generation` before querying Mongo and pass it back when
+    storing the result; an invalidation in between bumps the generation, so a
+    result that was read before a write can never be stored after it.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.generation = 0
+        self._all: Optional[List[dict]] = None
+        self._by_id: Dict[str, dict] = {}
+
+    def get_all(self) -> Optional[List[dict]]:
+        return self._all if self.enabled else None
+
+    def set_all(self, courses: List[dict], generation: int):
+        if self.enabled and generation == self.generation:
+            self._all = courses
+            self._by_id.update((course["id"], course) for course in courses)
+
+    def get(self, course_id: str) -> Optional[dict]:
+        return self._by_id.get(course_id) if self.enabled else None
+
+    def put(self, course: dict, generation: int):
+        if self.enabled and generation == self.generation:
+            self._by_id[course["id"]] = course
+
+    def invalidate(self, course_id: Optional[str] = None):
+        """Drop one course (and the list containing it), or everything"""
+        self.generation += 1
+        self._all = None
+        if course_id is None:
+            self._by_id.clear()
+        else:
+            self._by_id.pop(course_id, None)
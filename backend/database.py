@@ -0,0 +1,165 @@
+"""MongoDB client construction, pool monitoring and warm-up."""
+import asyncio
+import logging
+import threading
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import DuplicateKeyError
+
+import idempotency
+from access_log import current_request
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage so health checks can report saturation.
+
+    Pool events are published from the driver's worker threads, so the
+    counters are guarded by a lock.
+    """
+
+    def __init__(self, max_pool_size: int):
+        self.max_pool_size = max_pool_size
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "maxPoolSize": self.max_pool_size,
+                "open": self.open,
+                "checkedOut": self.checked_out,
+                "waiting": self.waiting,
+                "saturation": round(self.checked_out / self.max_pool_size, 3) if self.max_pool_size else 0.0,
+            }
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Counts the commands each request sends, for the access log.
+
+    Motor calls the driver with a copy of the request's context, so
+    current_request() still finds the request on the driver's threads.
+    """
+
+    def started(self, event):
+        stats = current_request()
+        if stats is not None:
+            collection = event.command.get(event.command_name)
+            stats.command_started(
+                event.request_id,
+                event.command_name,
+                collection if isinstance(collection, str) else None,
+            )
+
+    def succeeded(self, event):
+        stats = current_request()
+        if stats is not None:
+            stats.command_finished(event.request_id, event.duration_micros / 1000)
+
+    def failed(self, event):
+        stats = current_request()
+        if stats is not None:
+            stats.command_finished(event.request_id, event.duration_micros / 1000, str(event.failure.get("errmsg", "")))
+
+
+def create_client(settings: Settings):
+    """Build the Motor client with the configured pool; returns (client, pool_monitor)"""
+    pool_monitor = PoolMonitor(settings.mongo_max_pool_size)
+    client = AsyncIOMotorClient(
+        settings.mongo_url,
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+        serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+        connectTimeoutMS=settings.mongo_connect_timeout_ms,
+        event_listeners=[pool_monitor, CommandRecorder()],
+    )
+    return client, pool_monitor
+
+
+async def ensure_indexes(db, settings: Settings):
+    try:
+        # One record per course and date, also under concurrent requests
+        await db.attendance.create_index([("courseId", 1), ("date", 1)], unique=True)
+    except DuplicateKeyError:
+        logger.error("Duplicate attendance records exist, so (courseId, date) cannot be made unique; "
+                     "concurrent marks for one date are not prevented until they are removed")
+        await db.attendance.create_index([("courseId", 1), ("date", -1)])
+    # Serves the absences list in paging order (see paging.NEWEST_FIRST)
+    await db.attendance.create_index([("status", 1), ("date", -1), ("_id", -1)])
+    await db.courses.create_index("purgeAfter", sparse=True)
+    await db.attendance_events.create_index([("courseId", 1), ("_id", 1)])
+    # Date-ordered rollup figures and neighbour lookups (see rollups.py)
+    await db.rollup_records.create_index([("courseId", 1), ("status", 1), ("date", -1)])
+    await db.rollup_records.create_index([("courseId", 1), ("date", 1)])
+    await db.absence_runs.create_index([("courseId", 1), ("start", 1)])
+    await db.absence_runs.create_index([("courseId", 1), ("end", 1)])
+    await db.absence_runs.create_index([("courseId", 1), ("length", -1)])
+    await idempotency.ensure_ttl_index(db, settings.idempotency_ttl_s)
+
+
+async def ping(db, timeout: float) -> dict:
+    """Ping MongoDB and return the round-trip latency"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=timeout)
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__}
+    return {"ok": True, "latencyMs": round((time.perf_counter() - started) * 1000, 2)}
+
+
+async def warm_up(db, settings: Settings) -> bool:
+    """Open the connection pool and create indexes; returns whether it succeeded"""
+    try:
+        await ensure_indexes(db, settings)
+        # Concurrent pings force the driver to open minPoolSize connections now
+        # instead of on the first requests
+        await asyncio.gather(*(db.command("ping") for _ in range(max(settings.mongo_min_pool_size, 1))))
+    except Exception:
+        logger.exception("MongoDB warm-up failed; /api/ready will report not ready")
+        return False
+    return True
@@ -0,0 +1,115 @@
+"""Idempotency-Key support for the create endpoints.
+
+The first request with a given key claims it by inserting a "pending" record
+into the `idempotency_keys` collection, runs the handler and stores the
+response on the record. Retries with the same key get the stored response
+back without writing again; records expire through a TTL index.
+
+A retry that arrives while the first request is still running gets 409. The
+handler is cut off after HANDLER_TIMEOUT, so a record still pending after
+PENDING_TAKEOVER_AFTER can only belong to a request that died with its
+process; only then does a retry take the key over and run the handler. Each
+claim carries an owner token, and only its owner can complete or release it.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Longest a handler may run while holding a key
+HANDLER_TIMEOUT = timedelta(seconds=30)
+
+# A pending record older than this belongs to a request that died mid-flight
+# (it would have finished or timed out by now), so a retry may take the key
+# over instead of getting 409 until it expires
+PENDING_TAKEOVER_AFTER = 2 * HANDLER_TIMEOUT
+
+
+async def ensure_ttl_index(db, ttl_s: int):
+    try:
+        await db.idempotency_keys.create_index("createdAt", expireAfterSeconds=ttl_s)
+    except OperationFailure as e:
+        if e.code != 85:  # IndexOptionsConflict: the TTL was changed in .env
+            raise
+        await db.command(
+            "collMod", "idempotency_keys",
+            index={"keyPattern": {"createdAt": 1}, "expireAfterSeconds": ttl_s},
+        )
+
+
+def fingerprint(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def _claim(db, record_id: str, request_fingerprint: str, owner: str) -> Optional[dict]:
+    """Claim the key for `owner`; returns None if claimed, else the stored record to replay"""
+    now = datetime.utcnow()
+    try:
+        await db.idempotency_keys.insert_one({
+            "_id": record_id,
+            "fingerprint": request_fingerprint,
+            "state": "pending",
+            "owner": owner,
+            "createdAt": now,
+        })
+        return None
+    except DuplicateKeyError:
+        pass
+
+    existing = await db.idempotency_keys.find_one({"_id": record_id})
+    if existing is None:
+        # Expired between the insert and the lookup
+        return await _claim(db, record_id, request_fingerprint, owner)
+    if existing["fingerprint"] != request_fingerprint:
+        raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} was already used for a different request")
+    if existing["state"] == "done":
+        return existing
+
+    taken_over = await db.idempotency_keys.find_one_and_update(
+        {"_id": record_id, "state": "pending", "createdAt": {"$lt": now - PENDING_TAKEOVER_AFTER}},
+        {"$set": {"owner": owner, "createdAt": now}},
+    )
+    if taken_over is None:
+        raise HTTPException(status_code=409, detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress")
+    return None
+
+
+async def idempotent(db, key: Optional[str], scope: str, payload, handler: Callable[[], Awaitable[dict]]) -> dict:
+    """Run `handler` at most once per (scope, key) and replay its response to retries.
+
+    Without a key the handler simply runs. If the handler fails the key is
+    released, so the client can retry the same key.
+    """
+    if not key:
+        return await handler()
+
+    record_id = f"{scope}:{key}"
+    owner = uuid.uuid4().hex
+    existing = await _claim(db, record_id, fingerprint(payload), owner)
+    if existing is not None:
+        return existing["response"]
+
+    owned = {"_id": record_id, "state": "pending", "owner": owner}
+    try:
+        response = await asyncio.wait_for(handler(), HANDLER_TIMEOUT.total_seconds())
+    except asyncio.TimeoutError:
+        await db.idempotency_keys.delete_one(owned)
+        raise HTTPException(status_code=504, detail=f"Request timed out; retry with the same {IDEMPOTENCY_HEADER}")
+    except BaseException:
+        await db.idempotency_keys.delete_one(owned)
+        raise
+    result = await db.idempotency_keys.update_one(owned, {"$set": {"state": "done", "response": response}})
+    if not result.matched_count:
+        # Only possible if the record expired meanwhile; keep the response anyway
+        logger.warning("Idempotency record %s was no longer held by this request", record_id)
+    return response
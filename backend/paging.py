@@ -0,0 +1,60 @@
+"""Keyset pagination for the attendance lists.
+
+Lists are ordered newest first by (date, _id). A page's cursor encodes the
+last record it returned, so the next page resumes right after it even when
+records are added or deleted in between, and without an ever-growing skip.
+"""
+import base64
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 200
+
+# Sort order shared by every paged list; ties on date are broken by _id
+NEWEST_FIRST = [("date", -1), ("_id", -1)]
+
+
+def encode_cursor(record: dict) -> str:
+    raw = f"{record['date']}|{record['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, _, record_id = raw.rpartition("|")
+        return date, ObjectId(record_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict `query` to the records that sort after `cursor`"""
+    if not cursor:
+        return query
+    date, record_id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {"date": {"$lt": date}},
+            {"date": date, "_id": {"$lt": record_id}},
+        ],
+    }
+
+
+async def fetch_page(collection, query: dict, limit: Optional[int], cursor: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    """Returns one page of records and the cursor of the next, if any.
+
+    Without a limit the whole list is returned, as before paging existed.
+    """
+    find = collection.find(after_cursor(query, cursor)).sort(NEWEST_FIRST)
+    if limit is None:
+        return await find.to_list(1000), None
+    # One extra record tells whether another page follows
+    records = await find.limit(limit + 1).to_list(limit + 1)
+    if len(records) > limit:
+        return records[:limit], encode_cursor(records[limit - 1])
+    return records, None
@@ -0,0 +1,77 @@
+"""Background purge of soft-deleted courses.
+
+DELETE /courses/{id} only stamps the course with `deletedAt` and
+`purgeAfter`; it can be restored until `purgeAfter`. After that this worker
+deletes the course's attendance, attendance events, rollup records and
+absence runs in bounded batches, then its rollup and the course itself, so
+request latency does not depend on how much history it had.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CoursePurger:
+    """Periodically purges courses whose restore window has passed.
+
+    Several workers may run one each: every step is an idempotent delete, and
+    restores are only accepted before `purgeAfter`, so they never race a purge.
+    """
+
+    def __init__(self, db, interval_s: float = 60.0, batch_size: int = 500):
+        self.db = db
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                await self.purge_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Course purge failed; retrying in %ss", self.interval_s)
+            await asyncio.sleep(self.interval_s)
+
+    async def purge_due(self) -> int:
+        """Purge every course past its restore window; returns how many"""
+        due = await self.db.courses.find(
+            {"purgeAfter": {"$lte": datetime.utcnow()}},
+            {"_id": 1},
+        ).to_list(100)
+        for course in due:
+            await self.purge_course(course["_id"])
+        return len(due)
+
+    async def purge_course(self, course_id):
+        await self._delete_in_batches(self.db.attendance, {"courseId": course_id})
+        await self._delete_in_batches(self.db.attendance_events, {"courseId": course_id})
+        await self._delete_in_batches(self.db.rollup_records, {"courseId": course_id})
+        await self._delete_in_batches(self.db.absence_runs, {"courseId": course_id})
+        await self.db.course_rollups.delete_one({"_id": course_id})
+        await self.db.courses.delete_one({"_id": course_id, "purgeAfter": {"$lte": datetime.utcnow()}})
+        logger.info("Purged deleted course %s", course_id)
+
+    async def _delete_in_batches(self, collection, query: dict):
+        while True:
+            batch = await collection.find(query, {"_id": 1}).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                return
+            await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+            # Let request handlers run between batches
+            await asyncio.sleep(0)
@@ -0,0 +1,508 @@
+"""Per-course attendance rollups maintained from domain events.
+
+Every attendance create/update/delete in server.py emits an event through
+EventPipeline.emit(). Events are appended to the `attendance_events` log and
+folded into the course's document in `course_rollups`, so dashboards read one
+precomputed document instead of scanning `attendance`.
+
+Folding is incremental, so an event costs a bounded number of indexed
+operations however long the course's history is:
+
+- `rollup_records` keeps the last known state of each attendance record (one
+  small document per record, tombstoned on delete), so an event only undoes
+  that record's old counts and adds its new ones, as one `$inc` per batch.
+- `absence_runs` keeps each stretch of consecutive absences; an event only
+  adjusts the runs next to its date, and the absence streaks are read off the
+  longest run and the run ending at the latest date.
+
+Records a batch appends after the course's latest date (marking today, bulk
+marking) are stored with one insert and extend the runs in memory.
+
+Because the rollup is a fold over the log, it can always be rebuilt by
+replaying the events:
+
+    python rollups.py backfill   # log the changes `attendance` has and the log lacks, then rebuild
+    python rollups.py rebuild    # recompute every rollup from the event log
+
+If an event is never logged (the insert fails, or the process dies between
+writing `attendance` and emitting), the log no longer matches `attendance`;
+backfill reconciles the two, so it is also the repair for a failed emit.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date as date_type, datetime
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# Writers to one course take the same lock; a fixed pool, so the locks do not
+# grow with the number of courses ever written
+LOCK_STRIPES = 64
+
+# Events folded per $inc when replaying or backfilling the log
+REPLAY_BATCH_SIZE = 500
+
+
+def attendance_event(event_type: str, record: dict, previous_status: Optional[str] = None) -> dict:
+    """Build the event for a change to an attendance document"""
+    event = {
+        "type": event_type,
+        "attendanceId": record["_id"],
+        "courseId": record["courseId"],
+        "date": record["date"],
+        "status": record["status"],
+        "at": datetime.utcnow(),
+    }
+    if previous_status is not None:
+        event["previousStatus"] = previous_status
+    return event
+
+
+def empty_rollup(course_id) -> dict:
+    return {
+        "_id": course_id,
+        "version": 0,
+        "total": 0,
+        "byStatus": {},
+        "byWeekday": {},
+        "weekly": {},
+        "lastAttendedDate": None,
+        "currentAbsenceStreak": 0,
+        "longestAbsenceStreak": 0,
+    }
+
+
+def _state(record: dict) -> dict:
+    """The state rollup_records keeps for a record, with the buckets it counts in.
+
+    Raises ValueError for a date that is not ISO formatted.
+    """
+    day = date_type.fromisoformat(record["date"][:10])
+    year, week, _ = day.isocalendar()
+    return {
+        "date": record["date"],
+        "status": record["status"],
+        "weekday": day.strftime("%A"),
+        "week": f"{year}-W{week:02d}",
+    }
+
+
+def _count(deltas: dict, state: dict, delta: int):
+    """Add a record's contribution to the $inc paths in `deltas`"""
+    status = state["status"]
+    deltas["total"] += delta
+    deltas[f"byStatus.{status}"] += delta
+    deltas[f"byWeekday.{state['weekday']}.{status}"] += delta
+    deltas[f"weekly.{state['week']}.{status}"] += delta
+
+
+def _zero_counts(rollup: dict) -> dict:
+    """$unset paths for the counts (and emptied buckets) that dropped to zero"""
+    unset = {}
+    for status, count in rollup.get("byStatus", {}).items():
+        if not count:
+            unset[f"byStatus.{status}"] = ""
+    for field in ("byWeekday", "weekly"):
+        for name, bucket in rollup.get(field, {}).items():
+            if not any(bucket.values()):
+                unset[f"{field}.{name}"] = ""
+                continue
+            for status, count in bucket.items():
+                if not count:
+                    unset[f"{field}.{name}.{status}"] = ""
+    return unset
+
+
+def _live(record: Optional[dict]) -> Optional[dict]:
+    if record is None or record.get("deleted"):
+        return None
+    return {field: record[field] for field in ("date", "status", "weekday", "week")}
+
+
+def rollup_helper(rollup: dict) -> dict:
+    return {
+        "courseId": str(rollup["_id"]),
+        "total": rollup.get("total", 0),
+        "byStatus": rollup.get("byStatus", {}),
+        "byWeekday": rollup.get("byWeekday", {}),
+        "weekly": rollup.get("weekly", {}),
+        "lastAttendedDate": rollup.get("lastAttendedDate"),
+        "currentAbsenceStreak": rollup.get("currentAbsenceStreak", 0),
+        "longestAbsenceStreak": rollup.get("longestAbsenceStreak", 0),
+    }
+
+
+class EventPipeline:
+    """Appends attendance events to the log and folds them into rollups"""
+
+    def __init__(self, db):
+        self.db = db
+        # Serialises writers to one course within this process, which keeps
+        # its absence runs exact; counts are atomic $incs, and the version
+        # check keeps other workers' derived figures from overwriting newer ones
+        self._locks = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock_for(self, course_id) -> asyncio.Lock:
+        return self._locks[hash(course_id) % LOCK_STRIPES]
+
+    async def emit(self, *events: dict):
+        """Record and apply events; failures leave the rollup stale, never the request failed"""
+        if not events:
+            return
+        try:
+            await self.db.attendance_events.insert_many([dict(event) for event in events])
+            by_course = {}
+            for event in events:
+                by_course.setdefault(event["courseId"], []).append(event)
+            for course_id, course_events in by_course.items():
+                async with self._lock_for(course_id):
+                    await self._apply(course_id, course_events)
+        except Exception:
+            logger.exception("Could not log or apply attendance events; run `python rollups.py backfill`")
+
+    async def _apply(self, course_id, events: List[dict]):
+        rollup = await self._fold(course_id, events)
+        if rollup is not None:
+            await self._derive(rollup)
+
+    async def _fold(self, course_id, events: List[dict]) -> Optional[dict]:
+        """Update the record states, absence runs and counts for a batch of events.
+
+        Returns the rollup after the batch, or None if nothing changed.
+        """
+        # Every event is checked before any record state is written, so a
+        # bad one cannot leave rollup_records ahead of the counts
+        batch = []
+        for event in events:
+            try:
+                batch.append((event, None if event["type"] == DELETED else _state(event)))
+            except (KeyError, TypeError, ValueError):
+                logger.warning("Skipping attendance event %s for record %s with invalid date %r",
+                               event.get("_id"), event.get("attendanceId"), event.get("date"))
+
+        deltas = defaultdict(int)
+        changed = False
+        inserted = await self._append_created(course_id, batch)
+        for event, state in batch:
+            if event["attendanceId"] in inserted:
+                inserted.discard(event["attendanceId"])
+                previous, current = None, state
+            else:
+                previous, current = await self._record(event, state)
+                if previous == current:
+                    continue  # e.g. a replayed "created"
+                if previous is not None:
+                    await self._remove_from_runs(course_id, previous)
+                if current is not None:
+                    await self._add_to_runs(course_id, current)
+            if previous is not None:
+                _count(deltas, previous, -1)
+            if current is not None:
+                _count(deltas, current, +1)
+            changed = True
+        if not changed:
+            return None
+
+        increments = {path: delta for path, delta in deltas.items() if delta}
+        increments["version"] = 1
+        return await self.db.course_rollups.find_one_and_update(
+            {"_id": course_id},
+            {"$inc": increments},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _latest(self, course_id) -> Optional[dict]:
+        return await self.db.rollup_records.find_one(
+            {"courseId": course_id, "status": {"$ne": None}},
+            {"date": 1, "status": 1},
+            sort=[("date", -1)],
+        )
+
+    async def _append_created(self, course_id, batch: List[tuple]) -> set:
+        """Store the records a batch creates after the course's latest date in one insert.
+
+        The common case (marking today, bulk-marking new dates) then costs a
+        fixed number of round trips per batch. Returns the attendance ids
+        stored; anything else, including ids rollup_records already has
+        (replays, tombstones), goes through _record() one event at a time.
+        """
+        first_events = {}
+        for event, state in batch:
+            first_events.setdefault(event["attendanceId"], (event, state))
+        states = [
+            {"_id": attendance_id, "courseId": event["courseId"], **state}
+            for attendance_id, (event, state) in first_events.items()
+            if event["type"] == CREATED
+        ]
+        if not states:
+            return set()
+        latest = await self._latest(course_id)
+        dates = [state["date"] for state in states]
+        if len(set(dates)) != len(dates) or (latest is not None and min(dates) <= latest["date"]):
+            return set()
+
+        states.sort(key=lambda state: state["date"])
+        try:
+            await self.db.rollup_records.insert_many(states, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details["writeErrors"]
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            failed = {states[error["index"]]["_id"] for error in errors}
+            states = [state for state in states if state["_id"] not in failed]
+        await self._extend_runs(course_id, latest, states)
+        return {state["_id"] for state in states}
+
+    async def _record(self, event: dict, current: Optional[dict]):
+        """Store `current` as the record's state after `event`; returns its (previous, current) state"""
+        records = self.db.rollup_records
+        attendance_id = event["attendanceId"]
+        if event["type"] == DELETED:
+            previous = await records.find_one_and_update(
+                {"_id": attendance_id},
+                {"$set": {"courseId": event["courseId"], "status": None, "deleted": True}},
+                upsert=True,
+            )
+            return _live(previous), None
+
+        try:
+            # An "updated" for a record the log never saw created (e.g. written
+            # before backfill) counts it from here on
+            previous = await records.find_one_and_update(
+                {"_id": attendance_id, "deleted": {"$ne": True}},
+                {"$set": {"courseId": event["courseId"], **current}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Deleted already; attendance ids are never reused, so this is a
+            # late event for a record that no longer exists
+            return None, None
+        return _live(previous), current
+
+    # Absence runs: one document per maximal stretch of consecutive absent
+    # records, {courseId, start, end, length}. A change only touches the runs
+    # next to its date, found through indexed lookups, and the streak figures
+    # are single reads: the longest run, and the run ending at the latest date.
+
+    async def _neighbour(self, course_id, day: str, direction: int) -> Optional[dict]:
+        """The live record just before (-1) or after (+1) `day`"""
+        return await self.db.rollup_records.find_one(
+            {"courseId": course_id, "status": {"$ne": None}, "date": {"$lt" if direction < 0 else "$gt": day}},
+            {"date": 1, "status": 1},
+            sort=[("date", direction)],
+        )
+
+    async def _run_containing(self, course_id, day: str) -> Optional[dict]:
+        run = await self.db.absence_runs.find_one(
+            {"courseId": course_id, "end": {"$gte": day}},
+            sort=[("end", 1)],
+        )
+        return run if run is not None and run["start"] <= day else None
+
+    async def _adjacent_runs(self, course_id, day: str):
+        """The runs ending just before `day` and starting just after it"""
+        runs = self.db.absence_runs
+        before = await self._neighbour(course_id, day, -1)
+        after = await self._neighbour(course_id, day, +1)
+        left = right = None
+        if before is not None and before["status"] == "absent":
+            left = await runs.find_one({"courseId": course_id, "end": before["date"]})
+        if after is not None and after["status"] == "absent":
+            right = await runs.find_one({"courseId": course_id, "start": after["date"]})
+        return before, after, left, right
+
+    async def _add_to_runs(self, course_id, state: dict):
+        """Account for a live record now at state["date"]"""
+        runs = self.db.absence_runs
+        day = state["date"]
+        spanning = await self._run_containing(course_id, day)
+        if spanning is not None and not spanning["start"] < day < spanning["end"]:
+            spanning = None
+
+        if state["status"] == "absent":
+            if spanning is not None:
+                await runs.update_one({"_id": spanning["_id"]}, {"$inc": {"length": 1}})
+                return
+            _, _, left, right = await self._adjacent_runs(course_id, day)
+            if left is not None and right is not None:
+                await runs.update_one({"_id": left["_id"]}, {"$set": {"end": right["end"]}, "$inc": {"length": right["length"] + 1}})
+                await runs.delete_one({"_id": right["_id"]})
+            elif left is not None:
+                await runs.update_one({"_id": left["_id"]}, {"$set": {"end": day}, "$inc": {"length": 1}})
+            elif right is not None:
+                await runs.update_one({"_id": right["_id"]}, {"$set": {"start": day}, "$inc": {"length": 1}})
+            else:
+                await runs.insert_one({"courseId": course_id, "start": day, "end": day, "length": 1})
+        elif spanning is not None:
+            # Splits the run it lands in
+            before = await self._neighbour(course_id, day, -1)
+            after = await self._neighbour(course_id, day, +1)
+            left_length = await self.db.rollup_records.count_documents(
+                {"courseId": course_id, "status": "absent", "date": {"$gte": spanning["start"], "$lte": before["date"]}}
+            )
+            await runs.update_one({"_id": spanning["_id"]}, {"$set": {"end": before["date"], "length": left_length}})
+            await runs.insert_one({
+                "courseId": course_id,
+                "start": after["date"],
+                "end": spanning["end"],
+                "length": spanning["length"] - left_length,
+            })
+
+    async def _remove_from_runs(self, course_id, state: dict):
+        """Account for the record at state["date"] no longer having `state`"""
+        runs = self.db.absence_runs
+        day = state["date"]
+        if state["status"] == "absent":
+            run = await self._run_containing(course_id, day)
+            if run is None:
+                return
+            if run["length"] <= 1:
+                await runs.delete_one({"_id": run["_id"]})
+                return
+            update = {"$inc": {"length": -1}}
+            if run["start"] == day:
+                update["$set"] = {"start": (await self._neighbour(course_id, day, +1))["date"]}
+            elif run["end"] == day:
+                update["$set"] = {"end": (await self._neighbour(course_id, day, -1))["date"]}
+            await runs.update_one({"_id": run["_id"]}, update)
+        else:
+            # It may have separated two runs that now meet
+            _, _, left, right = await self._adjacent_runs(course_id, day)
+            if left is not None and right is not None:
+                await runs.update_one({"_id": left["_id"]}, {"$set": {"end": right["end"]}, "$inc": {"length": right["length"]}})
+                await runs.delete_one({"_id": right["_id"]})
+
+    async def _extend_runs(self, course_id, latest: Optional[dict], states: List[dict]):
+        """Account for records appended after `latest`, in date order, with at most two writes"""
+        runs = self.db.absence_runs
+        tail = None
+        if latest is not None and latest["status"] == "absent":
+            tail = await runs.find_one({"courseId": course_id, "end": latest["date"]})
+        run, new_runs = tail, []
+        for state in states:
+            if state["status"] != "absent":
+                run = None
+            elif run is None:
+                run = {"courseId": course_id, "start": state["date"], "end": state["date"], "length": 1}
+                new_runs.append(run)
+            else:
+                run["end"] = state["date"]
+                run["length"] += 1
+        if tail is not None:
+            await runs.update_one({"_id": tail["_id"]}, {"$set": {"end": tail["end"], "length": tail["length"]}})
+        if new_runs:
+            await runs.insert_many(new_runs)
+
+    async def _derive(self, rollup: dict):
+        """Read the figures that depend on date order back from rollup_records and absence_runs"""
+        course_id = rollup["_id"]
+        latest = await self._latest(course_id)
+        attended = await self.db.rollup_records.find_one(
+            {"courseId": course_id, "status": "present"},
+            {"date": 1},
+            sort=[("date", -1)],
+        )
+        longest = await self.db.absence_runs.find_one({"courseId": course_id}, sort=[("length", -1)])
+        current = None
+        if latest is not None:
+            current = await self.db.absence_runs.find_one({"courseId": course_id, "end": latest["date"]})
+
+        update = {"$set": {
+            "lastAttendedDate": attended["date"] if attended else None,
+            "currentAbsenceStreak": current["length"] if current else 0,
+            "longestAbsenceStreak": longest["length"] if longest else 0,
+        }}
+        unset = _zero_counts(rollup)
+        if unset:
+            update["$unset"] = unset
+        # A writer that folded a later batch in the meantime derives after us
+        await self.db.course_rollups.update_one({"_id": course_id, "version": rollup["version"]}, update)
+
+    async def rebuild(self, course_id=None) -> int:
+        """Recompute rollups by replaying the event log; returns how many were rebuilt"""
+        course_ids = [course_id] if course_id is not None else await self.db.attendance_events.distinct("courseId")
+        for cid in course_ids:
+            async with self._lock_for(cid):
+                await self.db.rollup_records.delete_many({"courseId": cid})
+                await self.db.absence_runs.delete_many({"courseId": cid})
+                await self.db.course_rollups.delete_one({"_id": cid})
+                batch = []
+                async for event in self.db.attendance_events.find({"courseId": cid}).sort("_id", 1):
+                    batch.append(event)
+                    if len(batch) >= REPLAY_BATCH_SIZE:
+                        await self._fold(cid, batch)
+                        batch = []
+                await self._fold(cid, batch)
+                # Derived once, from the final state, rather than per batch
+                rollup = await self.db.course_rollups.find_one({"_id": cid})
+                if rollup is not None:
+                    await self._derive(rollup)
+        return len(course_ids)
+
+    async def backfill(self) -> int:
+        """Log the events `attendance` has and the log lacks; returns how many.
+
+        Covers attendance from before the pipeline existed and changes whose
+        event was never logged (the insert failed, or the process died before
+        emitting): the log's last state of each record is compared with
+        `attendance`, and the difference is logged as created, updated and
+        deleted events. A change racing the backfill may be logged twice,
+        which replays to the same state. Run rebuild afterwards.
+        """
+        backfilled = 0
+        for course in await self.db.courses.find({}, {"_id": 1}).to_list(None):
+            course_id = course["_id"]
+            logged = {}
+            async for event in self.db.attendance_events.find({"courseId": course_id}).sort("_id", 1):
+                logged[event["attendanceId"]] = event
+            batch = []
+            async for record in self.db.attendance.find({"courseId": course_id}).sort("_id", 1):
+                last = logged.pop(record["_id"], None)
+                if last is None or last["type"] == DELETED:
+                    batch.append(attendance_event(CREATED, record))
+                elif (last["date"], last["status"]) != (record["date"], record["status"]):
+                    batch.append(attendance_event(UPDATED, record, previous_status=last["status"]))
+                if len(batch) >= REPLAY_BATCH_SIZE:
+                    await self.db.attendance_events.insert_many(batch)
+                    backfilled += len(batch)
+                    batch = []
+            # Logged as live but gone from attendance
+            for last in logged.values():
+                if last["type"] != DELETED:
+                    batch.append(attendance_event(DELETED, {**last, "_id": last["attendanceId"]}))
+            if batch:
+                await self.db.attendance_events.insert_many(batch)
+                backfilled += len(batch)
+        return backfilled
+
+
+async def _main(command: str):
+    import database
+    from settings import Settings
+
+    settings = Settings.from_env()
+    client, _ = database.create_client(settings)
+    pipeline = EventPipeline(client[settings.db_name])
+    try:
+        if command == "backfill":
+            print(f"Logged {await pipeline.backfill()} missing attendance events")
+        print(f"Rebuilt {await pipeline.rebuild()} rollups")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2 or sys.argv[1] not in ("backfill", "rebuild"):
+        sys.exit("usage: python rollups.py backfill|rebuild")
+    asyncio.run(_main(sys.argv[1]))
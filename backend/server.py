@@ -1,28 +1,49 @@
-from fastapi import FastAPI, APIRouter, HTTPException
-from dotenv import load_dotenv
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from contextlib import asynccontextmanager
 import logging
-from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, Field
+from typing import Annotated, List, Optional
+from datetime import date, datetime, timedelta
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+import database
+from access_log import REQUEST_ID_HEADER, AccessLogMiddleware, AccessLogger, record_flattened_error, structured_logging
+from change_streams import CacheInvalidator
+from course_cache import CACHE_MODES, CourseCache
+from idempotency import IDEMPOTENCY_HEADER, idempotent
+from paging import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, fetch_page
+from purge import CoursePurger
+from rollups import CREATED, DELETED, UPDATED, EventPipeline, attendance_event, empty_rollup, rollup_helper
+from settings import Settings
+from throttling import RateLimiter, SingleFlight, parse_rate_limits, rate_limit
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
-
-# Create the main app without a prefix
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", dependencies=[Depends(rate_limit)])
+
+# Health probes share the prefix but are never rate limited
+health_router = APIRouter(prefix="/api")
+
+def get_db(request: Request):
+    return request.app.state.db
+
+def get_course_cache(request: Request) -> CourseCache:
+    return request.app.state.course_cache
+
+def get_flights(request: Request) -> SingleFlight:
+    return request.app.state.flights
+
+def get_events(request: Request) -> EventPipeline:
+    return request.app.state.events
+
+# Soft-deleted courses keep a deletedAt timestamp until purge.py removes them
+def active_course(course_id: str) -> dict:
+    return {"_id": ObjectId(course_id), "deletedAt": None}
 
 # Helper function to convert ObjectId to string
 def course_helper(course) -> dict:
@@ -73,82 +94,178 @@ class CourseUpdate(BaseModel):
     color: Optional[str] = None
     totalClassesInSemester: Optional[int] = None
 
+def iso_date(value: str) -> str:
+    # Stored as YYYY-MM-DD strings, which sort by date and feed the rollups
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError("date must be an ISO date (YYYY-MM-DD)")
+
+IsoDate = Annotated[str, AfterValidator(iso_date)]
+
 class AttendanceCreate(BaseModel):
     courseId: str
-    date: str  # ISO date string
+    date: IsoDate
     status: str  # "present" or "absent"
     notes: Optional[str] = ""
 
+class BulkAttendanceItem(BaseModel):
+    date: IsoDate
+    status: str
+    notes: Optional[str] = ""
+
+class BulkAttendanceCreate(BaseModel):
+    courseId: str
+    attendanceList: List[BulkAttendanceItem] = []
+
 class AttendanceUpdate(BaseModel):
     status: Optional[str] = None
     notes: Optional[str] = None
 
 # Course endpoints
 @api_router.post("/courses")
-async def create_course(course: CourseCreate):
-    course_dict = course.dict()
-    course_dict["totalClasses"] = 0
-    course_dict["attendedClasses"] = 0
-    course_dict["createdAt"] = datetime.utcnow().isoformat()
+async def create_course(
+    course: CourseCreate,
+    db=Depends(get_db),
+    cache=Depends(get_course_cache),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
+    async def create():
+        course_dict = course.dict()
+        course_dict["totalClasses"] = 0
+        course_dict["attendedClasses"] = 0
+        course_dict["createdAt"] = datetime.utcnow().isoformat()
+        
+        result = await db.courses.insert_one(course_dict)
+        cache.invalidate(str(result.inserted_id))
+        new_course = await db.courses.find_one({"_id": result.inserted_id})
+        return course_helper(new_course)
     
-    result = await db.courses.insert_one(course_dict)
-    new_course = await db.courses.find_one({"_id": result.inserted_id})
-    return course_helper(new_course)
+    return await idempotent(db, idempotency_key, "POST /courses", course.dict(), create)
 
 @api_router.get("/courses")
-async def get_courses():
-    courses = await db.courses.find().to_list(1000)
-    return [course_helper(course) for course in courses]
+async def get_courses(db=Depends(get_db), cache=Depends(get_course_cache), flights=Depends(get_flights)):
+    cached = cache.get_all()
+    if cached is not None:
+        return cached
+    
+    generation = cache.generation
+    
+    async def load():
+        courses = [course_helper(course) for course in await db.courses.find({"deletedAt": None}).to_list(1000)]
+        cache.set_all(courses, generation)
+        return courses
+    
+    return await flights.do(("courses", generation), load)
 
 @api_router.get("/courses/{course_id}")
-async def get_course(course_id: str):
+async def get_course(course_id: str, db=Depends(get_db), cache=Depends(get_course_cache), flights=Depends(get_flights)):
     try:
-        course = await db.courses.find_one({"_id": ObjectId(course_id)})
+        cached = cache.get(course_id)
+        if cached is not None:
+            return cached
+        
+        generation = cache.generation
+        
+        async def load():
+            course = await db.courses.find_one(active_course(course_id))
+            if course:
+                course = course_helper(course)
+                cache.put(course, generation)
+            return course
+        
+        course = await flights.do(("course", course_id, generation), load)
         if not course:
             raise HTTPException(status_code=404, detail="Course not found")
-        return course_helper(course)
+        return course
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.put("/courses/{course_id}")
-async def update_course(course_id: str, course_update: CourseUpdate):
+async def update_course(course_id: str, course_update: CourseUpdate, db=Depends(get_db), cache=Depends(get_course_cache)):
     try:
         update_data = {k: v for k, v in course_update.dict().items() if v is not None}
         if not update_data:
             raise HTTPException(status_code=400, detail="No data to update")
         
         result = await db.courses.update_one(
-            {"_id": ObjectId(course_id)},
+            active_course(course_id),
             {"$set": update_data}
         )
+        cache.invalidate(course_id)
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Course not found")
         
-        updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+        updated_course = await db.courses.find_one(active_course(course_id))
         return course_helper(updated_course)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.delete("/courses/{course_id}")
-async def delete_course(course_id: str):
+async def delete_course(course_id: str, request: Request, db=Depends(get_db), cache=Depends(get_course_cache)):
     try:
-        # Delete all attendance records for this course
-        await db.attendance.delete_many({"courseId": ObjectId(course_id)})
+        # Only mark the course deleted; its attendance is purged in the
+        # background once the restore window has passed (see purge.py)
+        deleted_at = datetime.utcnow()
+        purge_after = deleted_at + timedelta(seconds=request.app.state.settings.course_restore_window_s)
+        result = await db.courses.update_one(
+            active_course(course_id),
+            {"$set": {"deletedAt": deleted_at, "purgeAfter": purge_after}}
+        )
+        cache.invalidate(course_id)
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Course not found")
         
-        # Delete the course
-        result = await db.courses.delete_one({"_id": ObjectId(course_id)})
-        if result.deleted_count == 0:
+        return {"message": "Course deleted successfully", "restorableUntil": purge_after.isoformat()}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/courses/{course_id}/rollup")
+async def get_course_rollup(course_id: str, db=Depends(get_db)):
+    """Precomputed attendance figures for a course (see rollups.py)"""
+    try:
+        if not await db.courses.find_one(active_course(course_id), {"_id": 1}):
             raise HTTPException(status_code=404, detail="Course not found")
         
-        return {"message": "Course deleted successfully"}
+        rollup = await db.course_rollups.find_one({"_id": ObjectId(course_id)})
+        return rollup_helper(rollup or empty_rollup(ObjectId(course_id)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/courses/{course_id}/restore")
+async def restore_course(course_id: str, db=Depends(get_db), cache=Depends(get_course_cache)):
+    try:
+        result = await db.courses.update_one(
+            {"_id": ObjectId(course_id), "purgeAfter": {"$gt": datetime.utcnow()}},
+            {"$unset": {"deletedAt": "", "purgeAfter": ""}}
+        )
+        cache.invalidate(course_id)
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="No deleted course to restore")
+        
+        restored_course = await db.courses.find_one(active_course(course_id))
+        return course_helper(restored_course)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # Attendance endpoints
 @api_router.post("/attendance")
-async def create_attendance(attendance: AttendanceCreate):
-    try:
+async def create_attendance(
+    attendance: AttendanceCreate,
+    db=Depends(get_db),
+    cache=Depends(get_course_cache),
+    events=Depends(get_events),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
+    async def create():
+        if not await db.courses.find_one(active_course(attendance.courseId), {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Course not found")
+        
         # Check if attendance already exists for this course and date
         existing = await db.attendance.find_one({
             "courseId": ObjectId(attendance.courseId),
@@ -161,7 +278,11 @@ async def create_attendance(attendance: AttendanceCreate):
         attendance_dict = attendance.dict()
         attendance_dict["courseId"] = ObjectId(attendance.courseId)
         
-        result = await db.attendance.insert_one(attendance_dict)
+        try:
+            result = await db.attendance.insert_one(attendance_dict)
+        except DuplicateKeyError:
+            # A concurrent request marked the same date after our check
+            raise HTTPException(status_code=400, detail="Attendance already marked for this date")
         
         # Update course statistics
         update_query = {"$inc": {"totalClasses": 1}}
@@ -172,117 +293,203 @@ async def create_attendance(attendance: AttendanceCreate):
             {"_id": ObjectId(attendance.courseId)},
             update_query
         )
+        cache.invalidate(attendance.courseId)
+        await events.emit(attendance_event(CREATED, attendance_dict))
         
         new_attendance = await db.attendance.find_one({"_id": result.inserted_id})
         return attendance_helper(new_attendance)
+    
+    try:
+        return await idempotent(db, idempotency_key, "POST /attendance", attendance.dict(), create)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.post("/attendance/bulk")
-async def create_bulk_attendance(request: dict):
+async def create_bulk_attendance(
+    request: BulkAttendanceCreate,
+    db=Depends(get_db),
+    cache=Depends(get_course_cache),
+    events=Depends(get_events),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
     """
     Bulk create attendance records
     Request format: {"courseId": "...", "attendanceList": [{"date": "2025-01-15", "status": "present"}, ...]}
     """
-    try:
-        courseId = request.get("courseId")
-        attendanceList = request.get("attendanceList", [])
+    async def create():
+        courseId = request.courseId
+        attendanceList = request.attendanceList
+        
+        if not await db.courses.find_one(active_course(courseId), {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Course not found")
         
-        created_count = 0
+        created_records = []
         skipped_count = 0
         
-        for item in attendanceList:
-            # Check if attendance already exists
-            existing = await db.attendance.find_one({
-                "courseId": ObjectId(courseId),
-                "date": item["date"]
-            })
-            
-            if existing:
-                skipped_count += 1
-                continue
-            
-            # Create attendance record
-            attendance_dict = {
-                "courseId": ObjectId(courseId),
-                "date": item["date"],
-                "status": item["status"],
-                "notes": item.get("notes", "")
-            }
-            
-            await db.attendance.insert_one(attendance_dict)
-            
-            # Update course statistics
-            update_query = {"$inc": {"totalClasses": 1}}
-            if item["status"] == "present":
-                update_query["$inc"]["attendedClasses"] = 1
-            
-            await db.courses.update_one(
-                {"_id": ObjectId(courseId)},
-                update_query
-            )
-            
-            created_count += 1
+        try:
+            for item in attendanceList:
+                # Check if attendance already exists
+                existing = await db.attendance.find_one({
+                    "courseId": ObjectId(courseId),
+                    "date": item.date
+                })
+                
+                if existing:
+                    skipped_count += 1
+                    continue
+                
+                # Create attendance record
+                attendance_dict = {
+                    "courseId": ObjectId(courseId),
+                    "date": item.date,
+                    "status": item.status,
+                    "notes": item.notes
+                }
+                
+                try:
+                    await db.attendance.insert_one(attendance_dict)
+                except DuplicateKeyError:
+                    skipped_count += 1
+                    continue
+                created_records.append(attendance_dict)
+                
+                # Update course statistics
+                update_query = {"$inc": {"totalClasses": 1}}
+                if item.status == "present":
+                    update_query["$inc"]["attendedClasses"] = 1
+                
+                await db.courses.update_one(
+                    {"_id": ObjectId(courseId)},
+                    update_query
+                )
+        finally:
+            # Also on a partial failure, so the records that did go in are reflected
+            if created_records:
+                cache.invalidate(courseId)
+                await events.emit(*(attendance_event(CREATED, record) for record in created_records))
         
         return {
             "message": f"Bulk attendance created successfully",
-            "created": created_count,
+            "created": len(created_records),
             "skipped": skipped_count
         }
+    
+    try:
+        return await idempotent(db, idempotency_key, "POST /attendance/bulk", request.dict(), create)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/attendance/course/{course_id}")
-async def get_course_attendance(course_id: str):
+async def get_course_attendance(
+    course_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db=Depends(get_db),
+    cache=Depends(get_course_cache),
+    flights=Depends(get_flights),
+):
+    """Attendance of a course, newest first; pass `limit` to page through it"""
     try:
-        attendance_records = await db.attendance.find(
-            {"courseId": ObjectId(course_id)}
-        ).sort("date", -1).to_list(1000)
-        return [attendance_helper(record) for record in attendance_records]
+        if not await db.courses.find_one(active_course(course_id), {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        async def load():
+            attendance_records, next_cursor = await fetch_page(
+                db.attendance, {"courseId": ObjectId(course_id)}, limit, cursor
+            )
+            return [attendance_helper(record) for record in attendance_records], next_cursor
+        
+        # Every attendance write bumps the cache generation, so it doubles as
+        # the write epoch for coalescing
+        records, next_cursor = await flights.do(
+            ("course_attendance", course_id, limit, cursor, cache.generation), load
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return records
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/attendance/absences")
-async def get_all_absences():
+async def get_all_absences(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db=Depends(get_db),
+    cache=Depends(get_course_cache),
+    flights=Depends(get_flights),
+):
+    """Absences across active courses, newest first; pass `limit` to page through them"""
     try:
-        # Get all absence records
-        absences = await db.attendance.find(
-            {"status": "absent"}
-        ).sort("date", -1).to_list(1000)
-        
-        # Enrich with course information
-        result = []
-        for absence in absences:
-            course = await db.courses.find_one({"_id": absence["courseId"]})
-            if course:
+        async def load():
+            # Restricting to active courses up front keeps every page full
+            courses = {
+                course["_id"]: course
+                for course in await db.courses.find(
+                    {"deletedAt": None}, {"name": 1, "color": 1}
+                ).to_list(None)
+            }
+            absences, next_cursor = await fetch_page(
+                db.attendance,
+                {"status": "absent", "courseId": {"$in": list(courses)}},
+                limit,
+                cursor,
+            )
+            
+            # Enrich with course information
+            result = []
+            for absence in absences:
+                course = courses[absence["courseId"]]
                 absence_data = attendance_helper(absence)
                 absence_data["courseName"] = course["name"]
                 absence_data["courseColor"] = course.get("color", "#4A90E2")
                 result.append(absence_data)
+            
+            return result, next_cursor
         
-        return result
+        absences, next_cursor = await flights.do(("absences", limit, cursor, cache.generation), load)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return absences
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.put("/attendance/{attendance_id}")
-async def update_attendance(attendance_id: str, attendance_update: AttendanceUpdate):
+async def update_attendance(
+    attendance_id: str,
+    attendance_update: AttendanceUpdate,
+    db=Depends(get_db),
+    cache=Depends(get_course_cache),
+    events=Depends(get_events),
+):
     try:
-        # Get current attendance record
-        current = await db.attendance.find_one({"_id": ObjectId(attendance_id)})
-        if not current:
-            raise HTTPException(status_code=404, detail="Attendance record not found")
-        
-        old_status = current["status"]
-        new_status = attendance_update.status if attendance_update.status else old_status
-        
-        # Update attendance record
         update_data = {k: v for k, v in attendance_update.dict().items() if v is not None}
-        await db.attendance.update_one(
-            {"_id": ObjectId(attendance_id)},
-            {"$set": update_data}
-        )
+        while True:
+            # Get current attendance record
+            current = await db.attendance.find_one({"_id": ObjectId(attendance_id)})
+            if not current:
+                raise HTTPException(status_code=404, detail="Attendance record not found")
+            
+            old_status = current["status"]
+            new_status = attendance_update.status if attendance_update.status else old_status
+            
+            # Update attendance record, unless a concurrent update changed the
+            # status the counter adjustment below is based on
+            result = await db.attendance.update_one(
+                {"_id": ObjectId(attendance_id), "status": old_status},
+                {"$set": update_data}
+            )
+            if result.matched_count:
+                break
         
         # Update course statistics if status changed
         if attendance_update.status and old_status != new_status:
@@ -296,8 +503,10 @@ async def update_attendance(attendance_id: str, attendance_update: AttendanceUpd
                     {"_id": current["courseId"]},
                     {"$inc": {"attendedClasses": -1}}
                 )
+        cache.invalidate(str(current["courseId"]))
         
         updated_attendance = await db.attendance.find_one({"_id": ObjectId(attendance_id)})
+        await events.emit(attendance_event(UPDATED, updated_attendance, previous_status=old_status))
         return attendance_helper(updated_attendance)
     except HTTPException:
         raise
@@ -305,10 +514,11 @@ async def update_attendance(attendance_id: str, attendance_update: AttendanceUpd
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.delete("/attendance/{attendance_id}")
-async def delete_attendance(attendance_id: str):
+async def delete_attendance(attendance_id: str, db=Depends(get_db), cache=Depends(get_course_cache), events=Depends(get_events)):
     try:
-        # Get the attendance record first
-        attendance = await db.attendance.find_one({"_id": ObjectId(attendance_id)})
+        # Delete the attendance record; only the request that actually removed
+        # it adjusts the counters
+        attendance = await db.attendance.find_one_and_delete({"_id": ObjectId(attendance_id)})
         if not attendance:
             raise HTTPException(status_code=404, detail="Attendance record not found")
         
@@ -321,9 +531,8 @@ async def delete_attendance(attendance_id: str):
             {"_id": attendance["courseId"]},
             update_query
         )
-        
-        # Delete the attendance record
-        await db.attendance.delete_one({"_id": ObjectId(attendance_id)})
+        cache.invalidate(str(attendance["courseId"]))
+        await events.emit(attendance_event(DELETED, attendance))
         
         return {"message": "Attendance record deleted successfully"}
     except HTTPException:
@@ -335,24 +544,123 @@ async def delete_attendance(attendance_id: str):
 async def root():
     return {"message": "University Calendar API"}
 
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+@health_router.get("/health")
+async def health(request: Request, db=Depends(get_db)):
+    """Liveness probe: always answers, reporting pool usage and Mongo latency"""
+    state = request.app.state
+    ping = await database.ping(db, state.settings.health_ping_timeout_s)
+    return {
+        "status": "ok" if ping["ok"] else "degraded",
+        "warmedUp": state.warmed_up,
+        "mongo": ping,
+        "pool": state.pool_monitor.snapshot(),
+        "courseCache": {"mode": state.settings.course_cache, "enabled": state.course_cache.enabled},
+    }
+
+@health_router.get("/ready")
+async def ready(request: Request, db=Depends(get_db)):
+    """Readiness probe: 503 until the pool is warm and Mongo answers pings"""
+    state = request.app.state
+    ping = await database.ping(db, state.settings.health_ping_timeout_s)
+    if ping["ok"] and not state.warmed_up:
+        # Mongo was unreachable at startup but is back: finish warming up now
+        state.warmed_up = await database.warm_up(db, state.settings)
+    is_ready = state.warmed_up and ping["ok"]
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "warmedUp": state.warmed_up,
+            "mongo": ping,
+            "pool": state.pool_monitor.snapshot(),
+        },
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own logging and the Mongo client for the lifetime of the app"""
+    settings = app.state.settings
+    with structured_logging(settings.log_level):
+        async with _resources(app, settings):
+            yield
+
+@asynccontextmanager
+async def _resources(app: FastAPI, settings: Settings):
+    """Open the database and background workers, closing them on exit"""
+    client = app.state.mongo_client
+    if client is None:
+        client, pool_monitor = database.create_client(settings)
+    else:
+        # Injected client (e.g. the in-memory one in tests): no pool events
+        pool_monitor = database.PoolMonitor(settings.mongo_max_pool_size)
+    app.state.client = client
+    app.state.db = client[settings.db_name]
+    app.state.pool_monitor = pool_monitor
+    app.state.events = EventPipeline(app.state.db)
+    app.state.warmed_up = await database.warm_up(app.state.db, settings)
+    if app.state.warmed_up:
+        logger.info("MongoDB warm-up complete: %s", pool_monitor.snapshot())
+
+    invalidator = None
+    if settings.course_cache == "watch":
+        # Raises if the server has no change streams: fail startup, not serve stale
+        invalidator = CacheInvalidator(app.state.db, app.state.course_cache)
+        await invalidator.start()
+
+    purger = CoursePurger(app.state.db, settings.purge_interval_s, settings.purge_batch_size)
+    purger.start()
+    try:
+        yield
+    finally:
+        if invalidator is not None:
+            await invalidator.stop()
+        await purger.stop()
+        if app.state.mongo_client is None:
+            client.close()
+
+def create_app(settings: Optional[Settings] = None, mongo_client=None) -> FastAPI:
+    """Build the application; resources are opened by the lifespan, not here.
+
+    `mongo_client` replaces the Motor client built from `settings`; the caller
+    keeps ownership of it.
+    """
+    if settings is None:
+        settings = Settings.from_env()
+    if settings.course_cache not in CACHE_MODES:
+        raise ValueError(f"COURSE_CACHE must be one of {', '.join(CACHE_MODES)}, not {settings.course_cache!r}")
+    # Best effort: WEB_CONCURRENCY is what uvicorn and gunicorn default their
+    # worker count to, but `--workers N` / `gunicorn -w N` are not visible here
+    if settings.course_cache == "local" and settings.web_concurrency > 1:
+        raise ValueError("COURSE_CACHE=local serves stale data with several workers; use COURSE_CACHE=watch")
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.state.mongo_client = mongo_client
+    app.state.course_cache = CourseCache(enabled=settings.course_cache != "off")
+    app.state.flights = SingleFlight()
+    app.state.rate_limiter = RateLimiter(parse_rate_limits(settings.rate_limits))
+    app.state.access_log = AccessLogger(settings.log_sample_rate, settings.slow_request_ms)
+    app.add_exception_handler(StarletteHTTPException, record_flattened_error)
+    app.include_router(api_router)
+    app.include_router(health_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER],
+    )
+    # Outermost, so the logged duration covers every other middleware
+    app.add_middleware(AccessLogMiddleware)
+    return app
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+def __getattr__(name):
+    # `uvicorn server:app` keeps working: the app is only built (and the
+    # environment read) the first time `app` is looked up on this module
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,63 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration, normally read from the environment / .env"""
+    mongo_url: str
+    db_name: str
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 5
+    mongo_max_idle_time_ms: int = 60000
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_connect_timeout_ms: int = 10000
+    health_ping_timeout_s: float = 2.0
+    # "off", "local" (only safe with a single worker) or "watch" (multi-worker,
+    # needs a replica set); opt-in, as a per-worker cache goes stale under
+    # `--workers N` unless it is kept in sync by change streams
+    course_cache: str = "off"
+    # Workers per deployment as configured through WEB_CONCURRENCY; only used
+    # to refuse COURSE_CACHE=local with several workers
+    web_concurrency: int = 1
+    idempotency_ttl_s: int = 86400
+    # Per-client token buckets, "ROUTE=RATE:BURST,..." (see throttling.parse_rate_limits)
+    rate_limits: str = "*=10:30"
+    # Deleted courses can be restored for this long before purge.py removes them
+    course_restore_window_s: int = 604800
+    purge_interval_s: float = 60.0
+    purge_batch_size: int = 500
+    log_level: str = "INFO"
+    # Fraction of successful requests written to the access log; failed and
+    # slow requests are always logged
+    log_sample_rate: float = 0.1
+    slow_request_ms: float = 500.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv(ROOT_DIR / '.env')
+        return cls(
+            mongo_url=os.environ['MONGO_URL'],
+            db_name=os.environ['DB_NAME'],
+            mongo_max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+            mongo_min_pool_size=int(os.environ.get('MONGO_MIN_POOL_SIZE', '5')),
+            mongo_max_idle_time_ms=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '60000')),
+            mongo_server_selection_timeout_ms=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+            mongo_connect_timeout_ms=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '10000')),
+            health_ping_timeout_s=float(os.environ.get('HEALTH_PING_TIMEOUT_S', '2')),
+            course_cache=os.environ.get('COURSE_CACHE', 'off'),
+            web_concurrency=int(os.environ.get('WEB_CONCURRENCY', '1')),
+            idempotency_ttl_s=int(os.environ.get('IDEMPOTENCY_TTL_S', '86400')),
+            rate_limits=os.environ.get('RATE_LIMITS', '*=10:30'),
+            course_restore_window_s=int(os.environ.get('COURSE_RESTORE_WINDOW_S', '604800')),
+            purge_interval_s=float(os.environ.get('PURGE_INTERVAL_S', '60')),
+            purge_batch_size=int(os.environ.get('PURGE_BATCH_SIZE', '500')),
+            log_level=os.environ.get('LOG_LEVEL', 'INFO'),
+            log_sample_rate=float(os.environ.get('LOG_SAMPLE_RATE', '0.1')),
+            slow_request_ms=float(os.environ.get('SLOW_REQUEST_MS', '500')),
+        )
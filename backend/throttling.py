@@ -0,0 +1,141 @@
+"""Request coalescing and per-client rate limiting for the API routes."""
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+
+class SingleFlight:
+    """Lets concurrent identical reads share one in-flight query.
+
+    Callers include a write epoch in the key (see CourseCache.generation), so a
+    read issued after a write never joins a query that started before it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so one disconnecting client does not cancel the query for
+        # everyone else waiting on it
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()  # consumed here when every waiter went away
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available"""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Optional[Tuple[float, int]]]:
+    """Parse "ROUTE=RATE:BURST,..." into {route: (tokens per second, burst)}.
+
+    ROUTE is "METHOD /path/template" as declared on the router, or "*" for the
+    default; "off" instead of RATE:BURST disables limiting for that route.
+    """
+    limits: Dict[str, Optional[Tuple[float, int]]] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, limit = entry.rpartition("=")
+        if not route:
+            raise ValueError(f"Rate limit {entry!r} is not ROUTE=RATE:BURST")
+        if limit.strip() == "off":
+            limits[route.strip()] = None
+            continue
+        rate, _, burst = limit.partition(":")
+        rate = float(rate)
+        burst = int(burst or math.ceil(rate))
+        # A zero rate would never refill the bucket (and divide by zero
+        # computing Retry-After); use "off" or a small rate instead
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Rate limit {entry!r} needs RATE > 0 and BURST >= 1")
+        limits[route.strip()] = (rate, burst)
+    return limits
+
+
+class RateLimiter:
+    """Token buckets per (route, client)"""
+
+    # Buckets are dropped once they have been idle long enough to be full again
+    SWEEP_EVERY = 1000
+
+    def __init__(self, limits: Dict[str, Optional[Tuple[float, int]]]):
+        self.limits = limits
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._checks = 0
+
+    def limit_for(self, route: str) -> Optional[Tuple[float, int]]:
+        return self.limits.get(route, self.limits.get("*"))
+
+    def check(self, route: str, client: str) -> float:
+        """Returns 0 if the request may proceed, else the Retry-After in seconds"""
+        limit = self.limit_for(route)
+        if limit is None:
+            return 0.0
+
+        now = time.monotonic()
+        self._checks += 1
+        if self._checks % self.SWEEP_EVERY == 0:
+            self._sweep(now)
+
+        bucket = self._buckets.get((route, client))
+        if bucket is None:
+            bucket = self._buckets[(route, client)] = TokenBucket(*limit)
+        return bucket.take(now)
+
+    def _sweep(self, now: float):
+        for key, bucket in list(self._buckets.items()):
+            if (now - bucket.updated) * bucket.rate + bucket.tokens >= bucket.burst:
+                del self._buckets[key]
+
+
+def client_id(request: Request) -> str:
+    """Identify the calling device: explicit header, then proxy chain, then peer address"""
+    explicit = request.headers.get("x-client-id")
+    if explicit:
+        return explicit
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def rate_limit(request: Request):
+    """Router dependency enforcing the app's RateLimiter on the matched route"""
+    route = f"{request.method} {request.scope['route'].path}"
+    retry_after = request.app.state.rate_limiter.check(route, client_id(request))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
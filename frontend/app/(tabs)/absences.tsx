@@ -1,17 +1,17 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useCallback, useMemo } from 'react';
 import {
   View,
   Text,
   StyleSheet,
-  ScrollView,
+  FlatList,
   RefreshControl,
+  ActivityIndicator,
 } from 'react-native';
 import { Ionicons } from '@expo/vector-icons';
 import { useFocusEffect } from '@react-navigation/native';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { useLanguage } from '../../i18n/LanguageContext';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { usePagedList } from '../../services/pagedList';
 
 interface Absence {
   id: string;
@@ -22,36 +22,31 @@ interface Absence {
   notes: string;
 }
 
+// Absences are rendered as one flat, virtualized list with a header row
+// wherever the month changes
+type Row =
+  | { kind: 'month'; key: string; monthKey: string; first: boolean }
+  | { kind: 'absence'; key: string; absence: Absence };
+
 export default function Absences() {
   const { t, language } = useLanguage();
-  const [absences, setAbsences] = useState<Absence[]>([]);
-  const [loading, setLoading] = useState(true);
-  const [refreshing, setRefreshing] = useState(false);
-
-  const fetchAbsences = async () => {
-    try {
-      const response = await fetch(`${API_URL}/attendance/absences`);
-      const data = await response.json();
-      setAbsences(data);
-    } catch (error) {
-      console.error('Error fetching absences:', error);
-    } finally {
-      setLoading(false);
-      setRefreshing(false);
-    }
-  };
+  const {
+    items: absences,
+    hasMore,
+    loading,
+    refreshing,
+    loadingMore,
+    refresh,
+    onRefresh,
+    loadMore,
+  } = usePagedList<Absence>('/attendance/absences');
 
   useFocusEffect(
     useCallback(() => {
-      fetchAbsences();
-    }, [])
+      refresh();
+    }, [refresh])
   );
 
-  const onRefresh = () => {
-    setRefreshing(true);
-    fetchAbsences();
-  };
-
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
     const locale = language === 'ro' ? 'ro-RO' : 'en-US';
@@ -64,18 +59,21 @@ export default function Absences() {
     return date.toLocaleDateString(locale, options);
   };
 
-  const groupAbsencesByMonth = () => {
-    const grouped: { [key: string]: Absence[] } = {};
+  // The list arrives newest first, so each month's absences are contiguous
+  const rows = useMemo(() => {
+    const result: Row[] = [];
+    let currentMonth: string | null = null;
     absences.forEach((absence) => {
       const date = new Date(absence.date);
       const monthKey = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
-      if (!grouped[monthKey]) {
-        grouped[monthKey] = [];
+      if (monthKey !== currentMonth) {
+        result.push({ kind: 'month', key: `month-${monthKey}`, monthKey, first: currentMonth === null });
+        currentMonth = monthKey;
       }
-      grouped[monthKey].push(absence);
+      result.push({ kind: 'absence', key: absence.id, absence });
     });
-    return grouped;
-  };
+    return result;
+  }, [absences]);
 
   const getMonthLabel = (monthKey: string) => {
     const [year, month] = monthKey.split('-');
@@ -84,58 +82,74 @@ export default function Absences() {
     return date.toLocaleDateString(locale, { month: 'long', year: 'numeric' });
   };
 
-  const groupedAbsences = groupAbsencesByMonth();
-  const monthKeys = Object.keys(groupedAbsences).sort().reverse();
+  const renderRow = ({ item }: { item: Row }) => {
+    if (item.kind === 'month') {
+      return (
+        <Text style={[styles.monthLabel, !item.first && styles.monthLabelSpaced]}>
+          {getMonthLabel(item.monthKey)}
+        </Text>
+      );
+    }
+    const { absence } = item;
+    return (
+      <View style={styles.absenceCard}>
+        <View style={[styles.absenceColorBar, { backgroundColor: absence.courseColor }]} />
+        <View style={styles.absenceContent}>
+          <View style={styles.absenceHeader}>
+            <View style={styles.absenceInfo}>
+              <Text style={styles.courseName}>{absence.courseName}</Text>
+              <Text style={styles.dateText}>{formatDate(absence.date)}</Text>
+            </View>
+            <Ionicons name="close-circle" size={24} color="#FF3B30" />
+          </View>
+          {absence.notes && (
+            <View style={styles.notesContainer}>
+              <Text style={styles.notesText}>{absence.notes}</Text>
+            </View>
+          )}
+        </View>
+      </View>
+    );
+  };
 
   return (
     <SafeAreaView style={styles.container} edges={['top']}>
       <View style={styles.header}>
         <Text style={styles.headerTitle}>{t('absences')}</Text>
         <View style={styles.countBadge}>
-          <Text style={styles.countText}>{absences.length}</Text>
+          <Text style={styles.countText}>
+            {absences.length}
+            {hasMore ? '+' : ''}
+          </Text>
         </View>
       </View>
 
-      <ScrollView
-        style={styles.scrollView}
-        contentContainerStyle={styles.scrollContent}
+      <FlatList
+        style={styles.list}
+        contentContainerStyle={styles.listContent}
+        data={rows}
+        keyExtractor={(row) => row.key}
+        renderItem={renderRow}
+        onEndReached={loadMore}
+        onEndReachedThreshold={0.5}
         refreshControl={
           <RefreshControl refreshing={refreshing} onRefresh={onRefresh} tintColor="#4A90E2" />
         }
-      >
-        {absences.length === 0 ? (
-          <View style={styles.emptyState}>
-            <Ionicons name="checkmark-circle-outline" size={64} color="#34C759" />
-            <Text style={styles.emptyStateText}>{t('noAbsences')}</Text>
-            <Text style={styles.emptyStateSubtext}>{t('keepUp')}</Text>
-          </View>
-        ) : (
-          monthKeys.map((monthKey) => (
-            <View key={monthKey} style={styles.monthSection}>
-              <Text style={styles.monthLabel}>{getMonthLabel(monthKey)}</Text>
-              {groupedAbsences[monthKey].map((absence) => (
-                <View key={absence.id} style={styles.absenceCard}>
-                  <View style={[styles.absenceColorBar, { backgroundColor: absence.courseColor }]} />
-                  <View style={styles.absenceContent}>
-                    <View style={styles.absenceHeader}>
-                      <View style={styles.absenceInfo}>
-                        <Text style={styles.courseName}>{absence.courseName}</Text>
-                        <Text style={styles.dateText}>{formatDate(absence.date)}</Text>
-                      </View>
-                      <Ionicons name="close-circle" size={24} color="#FF3B30" />
-                    </View>
-                    {absence.notes && (
-                      <View style={styles.notesContainer}>
-                        <Text style={styles.notesText}>{absence.notes}</Text>
-                      </View>
-                    )}
-                  </View>
-                </View>
-              ))}
+        ListEmptyComponent={
+          loading ? (
+            <ActivityIndicator style={styles.loading} size="large" color="#4A90E2" />
+          ) : (
+            <View style={styles.emptyState}>
+              <Ionicons name="checkmark-circle-outline" size={64} color="#34C759" />
+              <Text style={styles.emptyStateText}>{t('noAbsences')}</Text>
+              <Text style={styles.emptyStateSubtext}>{t('keepUp')}</Text>
             </View>
-          ))
-        )}
-      </ScrollView>
+          )
+        }
+        ListFooterComponent={
+          loadingMore ? <ActivityIndicator style={styles.loadingMore} color="#4A90E2" /> : null
+        }
+      />
     </SafeAreaView>
   );
 }
@@ -169,21 +183,21 @@ const styles = StyleSheet.create({
     fontWeight: 'bold',
     color: '#FFFFFF',
   },
-  scrollView: {
+  list: {
     flex: 1,
   },
-  scrollContent: {
+  listContent: {
     padding: 16,
   },
-  monthSection: {
-    marginBottom: 24,
-  },
   monthLabel: {
     fontSize: 18,
     fontWeight: '600',
     color: '#FFFFFF',
     marginBottom: 12,
   },
+  monthLabelSpaced: {
+    marginTop: 12,
+  },
   absenceCard: {
     backgroundColor: '#1C1C1E',
     borderRadius: 16,
@@ -224,6 +238,12 @@ const styles = StyleSheet.create({
     fontSize: 14,
     color: '#FFFFFF',
   },
+  loading: {
+    paddingVertical: 60,
+  },
+  loadingMore: {
+    paddingVertical: 16,
+  },
   emptyState: {
     alignItems: 'center',
     justifyContent: 'center',
@@ -17,8 +17,9 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import ConfirmDialog from '../../components/ConfirmDialog';
 import { useLanguage } from '../../i18n/LanguageContext';
 import { cancelCourseNotifications } from '../../services/notificationService';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { invalidatePagedLists } from '../../services/pagedList';
+import { invalidateCourses, removeCourse, useCourses } from '../../services/courseQueries';
+import { apiFetch } from '../../services/api';
 
 interface Course {
   id: string;
@@ -35,37 +36,25 @@ interface Course {
 
 export default function Courses() {
   const { t } = useLanguage();
-  const [courses, setCourses] = useState<Course[]>([]);
-  const [loading, setLoading] = useState(true);
-  const [refreshing, setRefreshing] = useState(false);
+  const { data, error, refreshing, refresh: onRefresh, revalidate } = useCourses<Course>();
+  const courses = data ?? [];
   const [deleteDialogVisible, setDeleteDialogVisible] = useState(false);
   const [courseToDelete, setCourseToDelete] = useState<Course | null>(null);
 
-  const fetchCourses = async () => {
-    try {
-      const response = await fetch(`${API_URL}/courses`);
-      const data = await response.json();
-      setCourses(data);
-    } catch (error) {
-      console.error('Error fetching courses:', error);
+  useEffect(() => {
+    // Cached courses stay on screen when a background refresh fails
+    if (error && !data) {
       Alert.alert('Error', 'Failed to load courses');
-    } finally {
-      setLoading(false);
-      setRefreshing(false);
     }
-  };
+  }, [error]);
 
+  // Only refetches once the cached courses are stale
   useFocusEffect(
     useCallback(() => {
-      fetchCourses();
-    }, [])
+      revalidate();
+    }, [revalidate])
   );
 
-  const onRefresh = () => {
-    setRefreshing(true);
-    fetchCourses();
-  };
-
   const handleDelete = (course: Course) => {
     console.log('Delete button clicked for:', course.name);
     setCourseToDelete(course);
@@ -76,24 +65,30 @@ export default function Courses() {
     if (!courseToDelete) return;
     
     console.log('Confirming delete for:', courseToDelete.name);
+    const undoRemove = removeCourse(courseToDelete.id);
     try {
-      const response = await fetch(`${API_URL}/courses/${courseToDelete.id}`, {
+      const response = await apiFetch(`/courses/${courseToDelete.id}`, {
         method: 'DELETE',
       });
       console.log('Delete response status:', response.status);
       if (response.ok) {
+        invalidatePagedLists();
+
         // Cancel notifications for this course
         await cancelCourseNotifications(courseToDelete.id);
         
         setDeleteDialogVisible(false);
         setCourseToDelete(null);
-        fetchCourses();
       } else {
+        undoRemove();
         const errorData = await response.json().catch(() => ({}));
         console.error('Delete error:', errorData);
       }
     } catch (error: any) {
+      undoRemove();
       console.error('Delete exception:', error);
+    } finally {
+      invalidateCourses();
     }
   };
 
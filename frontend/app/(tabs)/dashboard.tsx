@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useEffect, useCallback } from 'react';
 import {
   View,
   Text,
@@ -14,14 +14,13 @@ import { useFocusEffect } from '@react-navigation/native';
 import { router } from 'expo-router';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { useLanguage } from '../../i18n/LanguageContext';
+import { useCourses } from '../../services/courseQueries';
 
 // Only import banner ad on native platforms
 const BannerAd = Platform.OS !== 'web' 
   ? require('../../components/BannerAd').default 
   : () => null;
 
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
-
 interface Course {
   id: string;
   name: string;
@@ -36,35 +35,23 @@ interface Course {
 
 export default function Dashboard() {
   const { t } = useLanguage();
-  const [courses, setCourses] = useState<Course[]>([]);
-  const [loading, setLoading] = useState(true);
-  const [refreshing, setRefreshing] = useState(false);
+  const { data, error, refreshing, refresh: onRefresh, revalidate } = useCourses<Course>();
+  const courses = data ?? [];
 
-  const fetchCourses = async () => {
-    try {
-      const response = await fetch(`${API_URL}/courses`);
-      const data = await response.json();
-      setCourses(data);
-    } catch (error) {
-      console.error('Error fetching courses:', error);
+  useEffect(() => {
+    // Cached courses stay on screen when a background refresh fails
+    if (error && !data) {
       Alert.alert('Error', 'Failed to load courses');
-    } finally {
-      setLoading(false);
-      setRefreshing(false);
     }
-  };
+  }, [error]);
 
+  // Only refetches once the cached courses are stale
   useFocusEffect(
     useCallback(() => {
-      fetchCourses();
-    }, [])
+      revalidate();
+    }, [revalidate])
   );
 
-  const onRefresh = () => {
-    setRefreshing(true);
-    fetchCourses();
-  };
-
   const translateCourseType = (type: string) => {
     const typeMap: { [key: string]: string } = {
       'course': t('course'),
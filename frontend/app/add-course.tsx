@@ -15,8 +15,8 @@ import { router } from 'expo-router';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { useLanguage } from '../i18n/LanguageContext';
 import { scheduleCourseNotifications } from '../services/notificationService';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { putCourse } from '../services/courseQueries';
+import { apiFetch } from '../services/api';
 
 const COLORS = ['#4A90E2', '#50C878', '#FFB347', '#FF6B6B', '#9B59B6', '#3498DB', '#E74C3C'];
 
@@ -126,7 +126,7 @@ export default function AddCourse() {
         bodyData.totalClassesInSemester = parseInt(totalClassesInSemester);
       }
 
-      const response = await fetch(`${API_URL}/courses`, {
+      const response = await apiFetch(`/courses`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -136,6 +136,7 @@ export default function AddCourse() {
 
       if (response.ok) {
         const newCourse = await response.json();
+        putCourse(newCourse);
         
         // Schedule notifications for the new course
         await scheduleCourseNotifications(newCourse, language);
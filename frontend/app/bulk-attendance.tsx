@@ -13,8 +13,9 @@ import {
 import { Ionicons } from '@expo/vector-icons';
 import { router, useLocalSearchParams } from 'expo-router';
 import { SafeAreaView } from 'react-native-safe-area-context';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { invalidatePagedLists } from '../services/pagedList';
+import { invalidateCourses, recordAttendance, useCourse } from '../services/courseQueries';
+import { apiFetch } from '../services/api';
 
 interface Course {
   id: string;
@@ -25,27 +26,16 @@ interface Course {
 
 export default function BulkAttendance() {
   const { courseId } = useLocalSearchParams();
-  const [loading, setLoading] = useState(true);
-  const [course, setCourse] = useState<Course | null>(null);
+  const { data: course, loading, error } = useCourse<Course>(String(courseId));
   const [numberOfPresences, setNumberOfPresences] = useState<number | null>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
 
   useEffect(() => {
-    fetchCourse();
-  }, []);
-
-  const fetchCourse = async () => {
-    try {
-      const response = await fetch(`${API_URL}/courses/${courseId}`);
-      const data = await response.json();
-      setCourse(data);
-    } catch (error) {
+    if (error && !course) {
       Alert.alert('Error', 'Failed to load course');
       router.back();
-    } finally {
-      setLoading(false);
     }
-  };
+  }, [error]);
 
   const handleSubmit = async () => {
     if (!numberOfPresences) {
@@ -58,6 +48,8 @@ export default function BulkAttendance() {
     }
 
     setIsSubmitting(true);
+    // Shown right away; corrected below for dates that were already marked
+    const undoRecord = recordAttendance(String(courseId), numberOfPresences, numberOfPresences);
     try {
       // Generate attendance list - all presences going backwards from YESTERDAY (not today)
       const today = new Date();
@@ -72,7 +64,7 @@ export default function BulkAttendance() {
         });
       }
 
-      const response = await fetch(`${API_URL}/attendance/bulk`, {
+      const response = await apiFetch(`/attendance/bulk`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -84,7 +76,10 @@ export default function BulkAttendance() {
       });
 
       if (response.ok) {
+        invalidatePagedLists();
         const result = await response.json();
+        undoRecord();
+        recordAttendance(String(courseId), result.created, result.created);
         if (Platform.OS === 'web') {
           alert(`Success! Added ${result.created} presences (skipped ${result.skipped} duplicates)`);
         } else {
@@ -92,6 +87,7 @@ export default function BulkAttendance() {
         }
         router.back();
       } else {
+        undoRecord();
         const error = await response.json();
         if (Platform.OS === 'web') {
           alert(error.detail || 'Failed to add bulk presences');
@@ -100,12 +96,15 @@ export default function BulkAttendance() {
         }
       }
     } catch (error) {
+      undoRecord();
       if (Platform.OS === 'web') {
         alert('Failed to add bulk presences');
       } else {
         Alert.alert('Error', 'Failed to add bulk presences');
       }
     } finally {
+      // Reconcile with the counts the backend actually stored
+      invalidateCourses();
       setIsSubmitting(false);
     }
   };
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   View,
   Text,
@@ -16,8 +16,9 @@ import { router, useLocalSearchParams } from 'expo-router';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import { useLanguage } from '../i18n/LanguageContext';
 import { scheduleCourseNotifications } from '../services/notificationService';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { invalidatePagedLists } from '../services/pagedList';
+import { putCourse, refetchCourse, useCourse } from '../services/courseQueries';
+import { apiFetch } from '../services/api';
 
 const COLORS = ['#4A90E2', '#50C878', '#FFB347', '#FF6B6B', '#9B59B6', '#3498DB', '#E74C3C'];
 
@@ -51,34 +52,59 @@ export default function EditCourse() {
     { key: 'Sunday', label: t('sunday') },
   ];
 
+  const { data } = useCourse<any>(String(courseId));
+  // Saving is enabled once the course has been read from the backend
+  const [synced, setSynced] = useState(false);
+  // The values each field was last filled with, to tell which ones the user changed
+  const filledWith = useRef<string[] | null>(null);
+
+  const formValues = () =>
+    [name, type, minAttendance, minAttendanceClasses, totalClassesInSemester, selectedColor, schedule];
+  const setters: Array<(value: any) => void> = [
+    setName,
+    setType,
+    setMinAttendance,
+    setMinAttendanceClasses,
+    setTotalClassesInSemester,
+    setSelectedColor,
+    setSchedule,
+  ];
+
+  // The cached course may be stale (e.g. persisted in an earlier session), and
+  // saving writes every field back, so always load the current one as well
   useEffect(() => {
-    fetchCourse();
+    refetchCourse(String(courseId))
+      .then(() => setSynced(true))
+      .catch(() => {
+        Alert.alert(t('error'), 'Failed to load course');
+        router.back();
+      });
   }, []);
 
-  const fetchCourse = async () => {
-    try {
-      const response = await fetch(`${API_URL}/courses/${courseId}`);
-      const data = await response.json();
-      setName(data.name);
-      setType(data.type);
-      if (data.minAttendancePercentage) {
-        setMinAttendance(data.minAttendancePercentage.toString());
-      }
-      if (data.minAttendanceClasses) {
-        setMinAttendanceClasses(data.minAttendanceClasses.toString());
-      }
-      setSelectedColor(data.color);
-      setSchedule(data.schedule);
-      if (data.totalClassesInSemester) {
-        setTotalClassesInSemester(data.totalClassesInSemester.toString());
-      }
-    } catch (error) {
-      Alert.alert(t('error'), 'Failed to load course');
-      router.back();
-    } finally {
-      setLoading(false);
+  // Fill the form, and when fresher data arrives refill every field the user
+  // has not changed yet, keeping the ones they have
+  useEffect(() => {
+    if (!data) {
+      return;
     }
-  };
+    const values = [
+      data.name,
+      data.type,
+      data.minAttendancePercentage ? data.minAttendancePercentage.toString() : '',
+      data.minAttendanceClasses ? data.minAttendanceClasses.toString() : '',
+      data.totalClassesInSemester ? data.totalClassesInSemester.toString() : '',
+      data.color,
+      data.schedule,
+    ];
+    const current = formValues();
+    values.forEach((value, i) => {
+      if (filledWith.current === null || JSON.stringify(current[i]) === filledWith.current[i]) {
+        setters[i](value);
+      }
+    });
+    filledWith.current = values.map((value) => JSON.stringify(value));
+    setLoading(false);
+  }, [data]);
 
   const addScheduleSlot = () => {
     setSchedule([...schedule, { day: 'Monday', startTime: '09:00', endTime: '10:00' }]);
@@ -129,7 +155,7 @@ export default function EditCourse() {
         bodyData.totalClassesInSemester = parseInt(totalClassesInSemester);
       }
 
-      const response = await fetch(`${API_URL}/courses/${courseId}`, {
+      const response = await apiFetch(`/courses/${courseId}`, {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
@@ -138,6 +164,9 @@ export default function EditCourse() {
       });
 
       if (response.ok) {
+        putCourse(await response.json());
+        // Absences show the course's name and color
+        invalidatePagedLists();
         Alert.alert('Success', 'Course updated successfully');
         router.back();
       } else {
@@ -170,10 +199,10 @@ export default function EditCourse() {
         <Text style={styles.headerTitle}>{t('editCourse')}</Text>
         <TouchableOpacity
           onPress={handleSubmit}
-          disabled={isSubmitting}
+          disabled={isSubmitting || !synced}
           style={styles.saveButton}
         >
-          <Text style={[styles.saveButtonText, isSubmitting && styles.saveButtonDisabled]}>
+          <Text style={[styles.saveButtonText, (isSubmitting || !synced) && styles.saveButtonDisabled]}>
             {t('save')}
           </Text>
         </TouchableOpacity>
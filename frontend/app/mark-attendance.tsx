@@ -3,7 +3,7 @@ import {
   View,
   Text,
   StyleSheet,
-  ScrollView,
+  FlatList,
   TouchableOpacity,
   Alert,
   TextInput,
@@ -15,8 +15,9 @@ import { Ionicons } from '@expo/vector-icons';
 import { router, useLocalSearchParams } from 'expo-router';
 import { SafeAreaView } from 'react-native-safe-area-context';
 import DateTimePicker from '@react-native-community/datetimepicker';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { invalidatePagedLists, usePagedList } from '../services/pagedList';
+import { invalidateCourses, recordAttendance, useCourse } from '../services/courseQueries';
+import { apiFetch } from '../services/api';
 
 interface Course {
   id: string;
@@ -34,44 +35,37 @@ interface AttendanceRecord {
 
 export default function MarkAttendance() {
   const { courseId } = useLocalSearchParams();
-  const [loading, setLoading] = useState(true);
-  const [course, setCourse] = useState<Course | null>(null);
-  const [attendanceRecords, setAttendanceRecords] = useState<AttendanceRecord[]>([]);
+  const { data: course, loading, error } = useCourse<Course>(String(courseId));
   const [selectedDate, setSelectedDate] = useState(new Date());
   const [showDatePicker, setShowDatePicker] = useState(false);
   const [status, setStatus] = useState<'present' | 'absent'>('present');
   const [notes, setNotes] = useState('');
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const {
+    items: attendanceRecords,
+    loadingMore,
+    refresh: refreshHistory,
+    loadMore,
+  } = usePagedList<AttendanceRecord>(`/attendance/course/${courseId}`);
 
   useEffect(() => {
-    fetchData();
+    refreshHistory();
   }, []);
 
-  const fetchData = async () => {
-    try {
-      const [courseResponse, attendanceResponse] = await Promise.all([
-        fetch(`${API_URL}/courses/${courseId}`),
-        fetch(`${API_URL}/attendance/course/${courseId}`),
-      ]);
-      
-      const courseData = await courseResponse.json();
-      const attendanceData = await attendanceResponse.json();
-      
-      setCourse(courseData);
-      setAttendanceRecords(attendanceData);
-    } catch (error) {
+  useEffect(() => {
+    if (error && !course) {
       Alert.alert('Error', 'Failed to load data');
       router.back();
-    } finally {
-      setLoading(false);
     }
-  };
+  }, [error]);
 
   const handleSubmit = async () => {
     setIsSubmitting(true);
+    // The course statistics update before the request completes
+    const undoRecord = recordAttendance(String(courseId), 1, status === 'present' ? 1 : 0);
     try {
       const dateString = selectedDate.toISOString().split('T')[0];
-      const response = await fetch(`${API_URL}/attendance`, {
+      const response = await apiFetch(`/attendance`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -85,6 +79,7 @@ export default function MarkAttendance() {
       });
 
       if (response.ok) {
+        invalidatePagedLists();
         if (Platform.OS === 'web') {
           alert('Attendance marked successfully');
         } else {
@@ -92,6 +87,7 @@ export default function MarkAttendance() {
         }
         router.back();
       } else {
+        undoRecord();
         const error = await response.json();
         if (Platform.OS === 'web') {
           alert(error.detail || 'Failed to mark attendance');
@@ -100,12 +96,14 @@ export default function MarkAttendance() {
         }
       }
     } catch (error) {
+      undoRecord();
       if (Platform.OS === 'web') {
         alert('Failed to mark attendance');
       } else {
         Alert.alert('Error', 'Failed to mark attendance');
       }
     } finally {
+      invalidateCourses();
       setIsSubmitting(false);
     }
   };
@@ -137,6 +135,20 @@ export default function MarkAttendance() {
     return date.toLocaleDateString('en-US', options);
   };
 
+  const renderHistoryItem = ({ item: record }: { item: AttendanceRecord }) => (
+    <View style={styles.historyItem}>
+      <View style={styles.historyItemLeft}>
+        <Ionicons
+          name={record.status === 'present' ? 'checkmark-circle' : 'close-circle'}
+          size={20}
+          color={record.status === 'present' ? '#34C759' : '#FF3B30'}
+        />
+        <Text style={styles.historyDate}>{formatDate(record.date)}</Text>
+      </View>
+      <Text style={styles.historyStatus}>{record.status}</Text>
+    </View>
+  );
+
   if (loading) {
     return (
       <SafeAreaView style={styles.container}>
@@ -165,126 +177,126 @@ export default function MarkAttendance() {
         behavior={Platform.OS === 'ios' ? 'padding' : 'height'}
         style={styles.keyboardView}
       >
-        <ScrollView style={styles.scrollView} contentContainerStyle={styles.scrollContent}>
-          <View style={[styles.courseCard, { borderLeftColor: course.color }]}>
-            <Text style={styles.courseName}>{course.name}</Text>
-            <Text style={styles.courseType}>{course.type}</Text>
-          </View>
+        <FlatList
+          style={styles.scrollView}
+          contentContainerStyle={styles.scrollContent}
+          data={attendanceRecords}
+          keyExtractor={(record) => record.id}
+          renderItem={renderHistoryItem}
+          onEndReached={loadMore}
+          onEndReachedThreshold={0.5}
+          keyboardShouldPersistTaps="handled"
+          ListFooterComponent={
+            loadingMore ? <ActivityIndicator style={styles.loadingMore} color="#4A90E2" /> : null
+          }
+          ListHeaderComponent={
+            <>
+              <View style={[styles.courseCard, { borderLeftColor: course.color }]}>
+                <Text style={styles.courseName}>{course.name}</Text>
+                <Text style={styles.courseType}>{course.type}</Text>
+              </View>
 
-          <View style={styles.section}>
-            <Text style={styles.sectionTitle}>Date</Text>
-            <TouchableOpacity
-              style={styles.dateButton}
-              onPress={() => setShowDatePicker(true)}
-            >
-              <Ionicons name="calendar" size={20} color="#4A90E2" />
-              <Text style={styles.dateButtonText}>{formatDateDisplay(selectedDate)}</Text>
-              <Ionicons name="chevron-down" size={20} color="#8E8E93" />
-            </TouchableOpacity>
-            {showDatePicker && (
-              <DateTimePicker
-                value={selectedDate}
-                mode="date"
-                display={Platform.OS === 'ios' ? 'spinner' : 'default'}
-                onChange={onDateChange}
-                maximumDate={new Date()}
-              />
-            )}
-            <Text style={styles.dateHelp}>You can select any past date to add old absences</Text>
-          </View>
+              <View style={styles.section}>
+                <Text style={styles.sectionTitle}>Date</Text>
+                <TouchableOpacity
+                  style={styles.dateButton}
+                  onPress={() => setShowDatePicker(true)}
+                >
+                  <Ionicons name="calendar" size={20} color="#4A90E2" />
+                  <Text style={styles.dateButtonText}>{formatDateDisplay(selectedDate)}</Text>
+                  <Ionicons name="chevron-down" size={20} color="#8E8E93" />
+                </TouchableOpacity>
+                {showDatePicker && (
+                  <DateTimePicker
+                    value={selectedDate}
+                    mode="date"
+                    display={Platform.OS === 'ios' ? 'spinner' : 'default'}
+                    onChange={onDateChange}
+                    maximumDate={new Date()}
+                  />
+                )}
+                <Text style={styles.dateHelp}>You can select any past date to add old absences</Text>
+              </View>
 
-          <View style={styles.section}>
-            <Text style={styles.sectionTitle}>Status</Text>
-            <View style={styles.statusButtons}>
-              <TouchableOpacity
-                style={[
-                  styles.statusButton,
-                  status === 'present' && styles.statusButtonPresent,
-                ]}
-                onPress={() => setStatus('present')}
-              >
-                <Ionicons
-                  name="checkmark-circle"
-                  size={32}
-                  color={status === 'present' ? '#FFFFFF' : '#34C759'}
+              <View style={styles.section}>
+                <Text style={styles.sectionTitle}>Status</Text>
+                <View style={styles.statusButtons}>
+                  <TouchableOpacity
+                    style={[
+                      styles.statusButton,
+                      status === 'present' && styles.statusButtonPresent,
+                    ]}
+                    onPress={() => setStatus('present')}
+                  >
+                    <Ionicons
+                      name="checkmark-circle"
+                      size={32}
+                      color={status === 'present' ? '#FFFFFF' : '#34C759'}
+                    />
+                    <Text
+                      style={[
+                        styles.statusButtonText,
+                        status === 'present' && styles.statusButtonTextActive,
+                      ]}
+                    >
+                      Present
+                    </Text>
+                  </TouchableOpacity>
+
+                  <TouchableOpacity
+                    style={[
+                      styles.statusButton,
+                      status === 'absent' && styles.statusButtonAbsent,
+                    ]}
+                    onPress={() => setStatus('absent')}
+                  >
+                    <Ionicons
+                      name="close-circle"
+                      size={32}
+                      color={status === 'absent' ? '#FFFFFF' : '#FF3B30'}
+                    />
+                    <Text
+                      style={[
+                        styles.statusButtonText,
+                        status === 'absent' && styles.statusButtonTextActive,
+                      ]}
+                    >
+                      Absent
+                    </Text>
+                  </TouchableOpacity>
+                </View>
+              </View>
+
+              <View style={styles.section}>
+                <Text style={styles.sectionTitle}>Notes (Optional)</Text>
+                <TextInput
+                  style={styles.notesInput}
+                  value={notes}
+                  onChangeText={setNotes}
+                  placeholder="Add a note..."
+                  placeholderTextColor="#8E8E93"
+                  multiline
+                  numberOfLines={4}
+                  textAlignVertical="top"
                 />
-                <Text
-                  style={[
-                    styles.statusButtonText,
-                    status === 'present' && styles.statusButtonTextActive,
-                  ]}
-                >
-                  Present
-                </Text>
-              </TouchableOpacity>
+              </View>
 
               <TouchableOpacity
-                style={[
-                  styles.statusButton,
-                  status === 'absent' && styles.statusButtonAbsent,
-                ]}
-                onPress={() => setStatus('absent')}
+                style={[styles.submitButton, isSubmitting && styles.submitButtonDisabled]}
+                onPress={handleSubmit}
+                disabled={isSubmitting}
               >
-                <Ionicons
-                  name="close-circle"
-                  size={32}
-                  color={status === 'absent' ? '#FFFFFF' : '#FF3B30'}
-                />
-                <Text
-                  style={[
-                    styles.statusButtonText,
-                    status === 'absent' && styles.statusButtonTextActive,
-                  ]}
-                >
-                  Absent
+                <Text style={styles.submitButtonText}>
+                  {isSubmitting ? 'Submitting...' : 'Mark Attendance'}
                 </Text>
               </TouchableOpacity>
-            </View>
-          </View>
-
-          <View style={styles.section}>
-            <Text style={styles.sectionTitle}>Notes (Optional)</Text>
-            <TextInput
-              style={styles.notesInput}
-              value={notes}
-              onChangeText={setNotes}
-              placeholder="Add a note..."
-              placeholderTextColor="#8E8E93"
-              multiline
-              numberOfLines={4}
-              textAlignVertical="top"
-            />
-          </View>
 
-          <TouchableOpacity
-            style={[styles.submitButton, isSubmitting && styles.submitButtonDisabled]}
-            onPress={handleSubmit}
-            disabled={isSubmitting}
-          >
-            <Text style={styles.submitButtonText}>
-              {isSubmitting ? 'Submitting...' : 'Mark Attendance'}
-            </Text>
-          </TouchableOpacity>
-
-          {attendanceRecords.length > 0 && (
-            <View style={styles.historySection}>
-              <Text style={styles.sectionTitle}>Recent Attendance</Text>
-              {attendanceRecords.slice(0, 5).map((record) => (
-                <View key={record.id} style={styles.historyItem}>
-                  <View style={styles.historyItemLeft}>
-                    <Ionicons
-                      name={record.status === 'present' ? 'checkmark-circle' : 'close-circle'}
-                      size={20}
-                      color={record.status === 'present' ? '#34C759' : '#FF3B30'}
-                    />
-                    <Text style={styles.historyDate}>{formatDate(record.date)}</Text>
-                  </View>
-                  <Text style={styles.historyStatus}>{record.status}</Text>
-                </View>
-              ))}
-            </View>
-          )}
-        </ScrollView>
+              {attendanceRecords.length > 0 && (
+                <Text style={styles.sectionTitle}>Attendance History</Text>
+              )}
+            </>
+          }
+        />
       </KeyboardAvoidingView>
     </SafeAreaView>
   );
@@ -419,8 +431,8 @@ const styles = StyleSheet.create({
     fontWeight: '600',
     color: '#FFFFFF',
   },
-  historySection: {
-    marginBottom: 24,
+  loadingMore: {
+    paddingVertical: 16,
   },
   historyItem: {
     backgroundColor: '#1C1C1E',
@@ -0,0 +1,44 @@
+import AsyncStorage from '@react-native-async-storage/async-storage';
+
+const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+
+const CLIENT_ID_KEY = 'clientId';
+
+let clientId: Promise<string> | null = null;
+
+function newClientId() {
+  const random = () => Math.random().toString(36).slice(2);
+  return `${Date.now().toString(36)}-${random()}${random()}`;
+}
+
+// A stable ID for this install; the backend rate limits per client ID, so
+// devices behind one proxy do not share a single budget
+export function getClientId(): Promise<string> {
+  if (!clientId) {
+    clientId = AsyncStorage.getItem(CLIENT_ID_KEY)
+      .then(async (stored) => {
+        if (stored) {
+          return stored;
+        }
+        const created = newClientId();
+        await AsyncStorage.setItem(CLIENT_ID_KEY, created);
+        return created;
+      })
+      .catch((error) => {
+        console.error('Error loading client ID:', error);
+        return newClientId();
+      });
+  }
+  return clientId;
+}
+
+// fetch() against the backend API, identifying this install
+export async function apiFetch(path: string, init: RequestInit = {}): Promise<Response> {
+  return fetch(`${API_URL}${path}`, {
+    ...init,
+    headers: {
+      ...(init.headers as Record<string, string> | undefined),
+      'X-Client-Id': await getClientId(),
+    },
+  });
+}
@@ -0,0 +1,91 @@
+import {
+  STALE_AFTER_MS,
+  deriveQueries,
+  fetchQuery,
+  invalidateQueries,
+  removeQuery,
+  setQueryData,
+  updateQueryData,
+  useQuery,
+} from './queryCache';
+
+// The fields the optimistic updates below touch; screens pass their own
+// Course interface as T
+interface CachedCourse {
+  id: string;
+  totalClasses: number;
+  attendedClasses: number;
+}
+
+const COURSES = '/courses';
+
+const coursePath = (courseId: string) => `${COURSES}/${courseId}`;
+
+// Opening a course from the list never needs its own request
+deriveQueries<CachedCourse[]>(COURSES, (courses) =>
+  courses.map((course) => [coursePath(course.id), course] as [string, CachedCourse])
+);
+
+export function useCourses<T>() {
+  return useQuery<T[]>(COURSES);
+}
+
+export function useCourse<T>(courseId: string) {
+  return useQuery<T>(coursePath(courseId));
+}
+
+// Always asks the backend, for screens that must not act on cached data
+export function refetchCourse<T>(courseId: string): Promise<T> {
+  return fetchQuery<T>(coursePath(courseId), 0);
+}
+
+export function fetchCourses<T>(): Promise<T[]> {
+  return fetchQuery<T[]>(COURSES, STALE_AFTER_MS);
+}
+
+// Refetches the courses after a write, reconciling any optimistic update
+export function invalidateCourses() {
+  invalidateQueries(COURSES);
+}
+
+function updateCachedCourse<T extends CachedCourse>(courseId: string, updater: (course: T) => T): () => void {
+  const undoList = updateQueryData<T[]>(COURSES, (courses) =>
+    courses.map((course) => (course.id === courseId ? updater(course) : course))
+  );
+  const undoCourse = updateQueryData<T>(coursePath(courseId), updater);
+  return () => {
+    undoList();
+    undoCourse();
+  };
+}
+
+/**
+ * Optimistically counts newly marked attendance into the course statistics;
+ * returns the undo for when the request fails.
+ */
+export function recordAttendance(courseId: string, total: number, attended: number): () => void {
+  return updateCachedCourse<CachedCourse>(courseId, (course) => ({
+    ...course,
+    totalClasses: course.totalClasses + total,
+    attendedClasses: course.attendedClasses + attended,
+  }));
+}
+
+// Stores a course returned by a create or update
+export function putCourse<T extends { id: string }>(course: T) {
+  setQueryData(coursePath(course.id), course);
+  updateQueryData<T[]>(COURSES, (courses) =>
+    courses.some((cached) => cached.id === course.id)
+      ? courses.map((cached) => (cached.id === course.id ? course : cached))
+      : [...courses, course]
+  );
+}
+
+// Optimistically drops a course; returns the undo for when the delete fails
+export function removeCourse(courseId: string): () => void {
+  const undo = updateQueryData<CachedCourse[]>(COURSES, (courses) =>
+    courses.filter((course) => course.id !== courseId)
+  );
+  removeQuery(coursePath(courseId));
+  return undo;
+}
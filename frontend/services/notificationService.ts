@@ -1,8 +1,7 @@
 import * as Notifications from 'expo-notifications';
 import { Platform } from 'react-native';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-
-const API_URL = process.env.EXPO_PUBLIC_BACKEND_URL + '/api';
+import { fetchCourses } from './courseQueries';
 
 // Configure notification handler
 Notifications.setNotificationHandler({
@@ -297,9 +296,8 @@ export async function cancelCourseNotifications(courseId: string): Promise<void>
 // Reschedule all notifications for all courses
 export async function rescheduleAllNotifications(language: string = 'en'): Promise<void> {
   try {
-    // Fetch all courses
-    const response = await fetch(`${API_URL}/courses`);
-    const courses: Course[] = await response.json();
+    // Fetch all courses; shares the request the dashboard makes on start
+    const courses = await fetchCourses<Course>();
     
     // Schedule notifications for each course
     for (const course of courses) {
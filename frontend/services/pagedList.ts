@@ -0,0 +1,132 @@
+import { useCallback, useEffect, useState } from 'react';
+import { apiFetch } from './api';
+
+// Set by the backend when another page follows; sent back as ?cursor=
+const NEXT_CURSOR_HEADER = 'X-Next-Cursor';
+const DEFAULT_PAGE_SIZE = 30;
+const MAX_CACHED_LISTS = 10;
+
+interface PagedListState<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// Pages fetched so far, per list path. Module level, so it outlives the
+// screens and a tab switch renders straight from it.
+const cache = new Map<string, PagedListState<any>>();
+
+function remember<T>(path: string, state: PagedListState<T>) {
+  // Re-inserting keeps the Map in least-recently-used order
+  cache.delete(path);
+  cache.set(path, state);
+  while (cache.size > MAX_CACHED_LISTS) {
+    cache.delete(cache.keys().next().value as string);
+  }
+}
+
+// Call after any write that can change a paged list
+export function invalidatePagedLists() {
+  cache.clear();
+}
+
+async function fetchPage<T>(path: string, pageSize: number, cursor: string | null): Promise<PagedListState<T>> {
+  const params = new URLSearchParams({ limit: String(pageSize) });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await apiFetch(`${path}?${params}`);
+  if (!response.ok) {
+    throw new Error(`Failed to load ${path}: ${response.status}`);
+  }
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get(NEXT_CURSOR_HEADER),
+  };
+}
+
+function sameHead<T>(loaded: T[], firstPage: T[]) {
+  return (
+    loaded.length >= firstPage.length &&
+    JSON.stringify(loaded.slice(0, firstPage.length)) === JSON.stringify(firstPage)
+  );
+}
+
+/**
+ * Loads a cursor-paged list endpoint one page at a time, for a FlatList with
+ * infinite scroll: pass `loadMore` to onEndReached and call `refresh` on focus.
+ */
+export function usePagedList<T>(path: string, pageSize: number = DEFAULT_PAGE_SIZE) {
+  const [state, setState] = useState<PagedListState<T>>(
+    () => cache.get(path) ?? { items: [], nextCursor: null }
+  );
+  const [loading, setLoading] = useState(!cache.has(path));
+  const [refreshing, setRefreshing] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  useEffect(() => {
+    const cached = cache.get(path);
+    setState(cached ?? { items: [], nextCursor: null });
+    setLoading(!cached);
+  }, [path]);
+
+  const apply = useCallback(
+    (next: PagedListState<T>) => {
+      remember(path, next);
+      setState(next);
+    },
+    [path]
+  );
+
+  const refresh = useCallback(async () => {
+    try {
+      const firstPage = await fetchPage<T>(path, pageSize, null);
+      const cached = cache.get(path);
+      // Keep the pages already scrolled through unless the newest ones changed
+      if (cached && firstPage.nextCursor && sameHead(cached.items, firstPage.items)) {
+        setState(cached);
+      } else {
+        apply(firstPage);
+      }
+    } catch (error) {
+      console.error('Error fetching list:', error);
+    } finally {
+      setLoading(false);
+      setRefreshing(false);
+    }
+  }, [path, pageSize, apply]);
+
+  const onRefresh = useCallback(() => {
+    setRefreshing(true);
+    refresh();
+  }, [refresh]);
+
+  const loadMore = useCallback(async () => {
+    const cached = cache.get(path);
+    if (!cached?.nextCursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage<T>(path, pageSize, cached.nextCursor);
+      // Dropped if a refresh replaced the list meanwhile
+      if (cache.get(path) === cached) {
+        apply({ items: [...cached.items, ...page.items], nextCursor: page.nextCursor });
+      }
+    } catch (error) {
+      console.error('Error fetching more:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [path, pageSize, loadingMore, apply]);
+
+  return {
+    items: state.items,
+    hasMore: state.nextCursor !== null,
+    loading,
+    refreshing,
+    loadingMore,
+    refresh,
+    onRefresh,
+    loadMore,
+  };
+}
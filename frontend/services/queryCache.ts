@@ -0,0 +1,240 @@
+import { useCallback, useEffect, useState } from 'react';
+import AsyncStorage from '@react-native-async-storage/async-storage';
+import { apiFetch } from './api';
+
+const STORAGE_PREFIX = 'queryCache:';
+
+// Data fetched more recently than this is served without asking the backend
+export const STALE_AFTER_MS = 30 * 1000;
+
+interface Entry<T> {
+  data: T;
+  updatedAt: number;
+}
+
+type Listener = (entry: Entry<any> | undefined) => void;
+type Deriver = (data: any) => Array<[string, any]>;
+
+// Shared by every screen: the last response per GET path, the requests in
+// flight, and who is rendering each path
+const entries = new Map<string, Entry<any>>();
+const inFlight = new Map<string, Promise<any>>();
+const hydrating = new Map<string, Promise<Entry<any> | undefined>>();
+const listeners = new Map<string, Set<Listener>>();
+const derivers = new Map<string, Deriver>();
+
+// Bumped by every local write to a path, so a response that was already in
+// flight cannot overwrite it (the same idea as the backend's CourseCache)
+const generations = new Map<string, number>();
+
+function generationOf(path: string) {
+  return generations.get(path) ?? 0;
+}
+
+function bump(path: string) {
+  generations.set(path, generationOf(path) + 1);
+}
+
+function notify(path: string) {
+  const entry = entries.get(path);
+  listeners.get(path)?.forEach((listener) => listener(entry));
+}
+
+function store<T>(path: string, entry: Entry<T>) {
+  entries.set(path, entry);
+  notify(path);
+  AsyncStorage.setItem(STORAGE_PREFIX + path, JSON.stringify(entry)).catch((error) =>
+    console.error('Error persisting query:', error)
+  );
+}
+
+function matches(path: string, prefix: string) {
+  return path === prefix || path.startsWith(prefix + '/');
+}
+
+/**
+ * Lets one response also answer other paths, e.g. every course in
+ * /courses answers /courses/{id}.
+ */
+export function deriveQueries<T>(path: string, derive: (data: T) => Array<[string, any]>) {
+  derivers.set(path, derive);
+}
+
+// Loads the persisted response for `path` into memory, once
+export function hydrateQuery<T>(path: string): Promise<Entry<T> | undefined> {
+  if (entries.has(path)) {
+    return Promise.resolve(entries.get(path));
+  }
+  let pending = hydrating.get(path);
+  if (!pending) {
+    pending = AsyncStorage.getItem(STORAGE_PREFIX + path)
+      .then((raw) => {
+        // A fetch may have finished while storage was being read
+        if (raw && !entries.has(path)) {
+          entries.set(path, JSON.parse(raw));
+          notify(path);
+        }
+        return entries.get(path);
+      })
+      .catch((error) => {
+        console.error('Error reading persisted query:', error);
+        return undefined;
+      })
+      .finally(() => hydrating.delete(path));
+    hydrating.set(path, pending);
+  }
+  return pending;
+}
+
+/**
+ * GETs `path`, unless a response younger than `maxAgeMs` is cached.
+ * Concurrent calls for one path share a single request.
+ */
+export function fetchQuery<T>(path: string, maxAgeMs: number = 0): Promise<T> {
+  const cached = entries.get(path);
+  if (cached && Date.now() - cached.updatedAt < maxAgeMs) {
+    return Promise.resolve(cached.data);
+  }
+  let request = inFlight.get(path);
+  if (!request) {
+    const generation = generationOf(path);
+    request = apiFetch(path)
+      .then(async (response) => {
+        if (!response.ok) {
+          throw new Error(`Failed to load ${path}: ${response.status}`);
+        }
+        const data = await response.json();
+        if (generationOf(path) === generation) {
+          const updatedAt = Date.now();
+          store(path, { data, updatedAt });
+          derivers.get(path)?.(data).forEach(([derivedPath, derivedData]) => {
+            bump(derivedPath);
+            store(derivedPath, { data: derivedData, updatedAt });
+          });
+        }
+        return data;
+      })
+      .finally(() => {
+        if (inFlight.get(path) === request) {
+          inFlight.delete(path);
+        }
+      });
+    inFlight.set(path, request);
+  }
+  return request;
+}
+
+export function getQueryData<T>(path: string): T | undefined {
+  return entries.get(path)?.data;
+}
+
+// Replaces the cached response, e.g. with the body of a successful write
+export function setQueryData<T>(path: string, data: T) {
+  bump(path);
+  store(path, { data, updatedAt: Date.now() });
+}
+
+/**
+ * Optimistically edits a cached response; returns a function that restores
+ * the previous one if the write behind the edit fails.
+ */
+export function updateQueryData<T>(path: string, updater: (data: T) => T): () => void {
+  const previous = entries.get(path);
+  if (!previous) {
+    return () => {};
+  }
+  bump(path);
+  store(path, { data: updater(previous.data), updatedAt: previous.updatedAt });
+  return () => {
+    bump(path);
+    store(path, previous);
+  };
+}
+
+export function removeQuery(path: string) {
+  bump(path);
+  entries.delete(path);
+  inFlight.delete(path);
+  notify(path);
+  AsyncStorage.removeItem(STORAGE_PREFIX + path).catch((error) =>
+    console.error('Error removing persisted query:', error)
+  );
+}
+
+/**
+ * Marks `prefix` and the paths below it stale after a write, refetching the
+ * ones a mounted screen is showing.
+ */
+export function invalidateQueries(prefix: string) {
+  const paths = new Set([...entries.keys(), ...listeners.keys()]);
+  paths.forEach((path) => {
+    if (!matches(path, prefix)) {
+      return;
+    }
+    bump(path);
+    inFlight.delete(path);
+    const entry = entries.get(path);
+    if (entry) {
+      entries.set(path, { ...entry, updatedAt: 0 });
+    }
+    if (listeners.get(path)?.size) {
+      fetchQuery(path).catch((error) => console.error('Error revalidating query:', error));
+    }
+  });
+}
+
+/**
+ * Renders a GET endpoint stale-while-revalidate: cached (or persisted) data
+ * is shown immediately and refetched in the background once it is older than
+ * `staleAfterMs`. Call `revalidate` on focus and `refresh` on pull-to-refresh.
+ */
+export function useQuery<T>(path: string, staleAfterMs: number = STALE_AFTER_MS) {
+  const [entry, setEntry] = useState<Entry<T> | undefined>(() => entries.get(path));
+  const [refreshing, setRefreshing] = useState(false);
+  const [error, setError] = useState<unknown>(null);
+
+  const load = useCallback(
+    async (maxAgeMs: number) => {
+      await hydrateQuery(path);
+      try {
+        await fetchQuery<T>(path, maxAgeMs);
+        setError(null);
+      } catch (fetchError) {
+        console.error('Error fetching query:', fetchError);
+        setError(fetchError);
+      }
+    },
+    [path]
+  );
+
+  const revalidate = useCallback(() => load(staleAfterMs), [load, staleAfterMs]);
+
+  const refresh = useCallback(async () => {
+    setRefreshing(true);
+    await load(0);
+    setRefreshing(false);
+  }, [load]);
+
+  useEffect(() => {
+    setEntry(entries.get(path));
+    if (!listeners.has(path)) {
+      listeners.set(path, new Set());
+    }
+    const subscribed = listeners.get(path)!;
+    subscribed.add(setEntry);
+    revalidate();
+    return () => {
+      subscribed.delete(setEntry);
+    };
+  }, [path, revalidate]);
+
+  return {
+    data: entry?.data,
+    // Only true while there is nothing at all to show
+    loading: entry === undefined && error === null,
+    error,
+    refreshing,
+    refresh,
+    revalidate,
+  };
+}
@@ -0,0 +1,81 @@
+import asyncio
+import inspect
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# backend/ is run as a flat directory of modules (`uvicorn server:app`)
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def _yielding(method):
+    async def wrapper(*args, **kwargs):
+        await asyncio.sleep(0)
+        return await method(*args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture(scope="session", autouse=True)
+def interleaved_mongo():
+    """Make every in-memory Mongo operation yield to the event loop first.
+
+    Motor suspends on each round-trip, which is where concurrent requests
+    interleave; mongomock_motor completes synchronously, which would hide
+    check-then-write races from the concurrency tests.
+    """
+    try:
+        import mongomock_motor
+    except ImportError:
+        yield
+        return
+    patched = []
+    for cls in (mongomock_motor.AsyncMongoMockCollection, mongomock_motor.AsyncCursor):
+        for name in dir(cls):
+            method = getattr(cls, name)
+            if not name.startswith("_") and inspect.iscoroutinefunction(method):
+                setattr(cls, name, _yielding(method))
+                patched.append((cls, name))
+    yield
+    for cls, name in patched:
+        delattr(cls, name)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def settings():
+    from settings import Settings
+
+    return Settings(
+        mongo_url="mongodb://in-memory",
+        db_name="calendar_test",
+        rate_limits="*=off",
+        # Off by default in production settings; exercised here
+        course_cache="local",
+        purge_interval_s=3600,
+    )
+
+
+@pytest.fixture
+def app(settings):
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+
+    return server.create_app(settings, mongo_client=AsyncMongoMockClient())
+
+
+@pytest.fixture
+async def client(app):
+    """httpx client talking to the app in-process, with its lifespan running"""
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api") as client:
+            yield client
@@ -0,0 +1,84 @@
+"""Access log sampling, slow-request capture and JSON output."""
+
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def access_records(caplog):
+    return [record for record in caplog.records if record.name == "access"]
+
+
+async def test_logs_request_fields(app, client, caplog):
+    from access_log import AccessLogger
+
+    app.state.access_log = AccessLogger(sample_rate=1.0)
+    with caplog.at_level(logging.INFO, logger="access"):
+        response = await client.get("/courses", headers={"X-Request-ID": "req-1"})
+
+    assert response.headers["X-Request-ID"] == "req-1"
+    [record] = access_records(caplog)
+    assert record.request_id == "req-1"
+    assert record.fields["route"] == "/api/courses"
+    assert record.fields["status"] == 200
+    assert record.fields["dbOps"] == 0  # the in-memory client sends no commands
+    assert "commands" not in record.fields
+
+
+async def test_samples_only_successful_requests(app, client, caplog):
+    from access_log import AccessLogger
+
+    app.state.access_log = AccessLogger(sample_rate=0.0)
+    with caplog.at_level(logging.INFO, logger="access"):
+        await client.get("/courses")
+        response = await client.get("/courses/invalid_id")
+
+    assert response.status_code == 400
+    [record] = access_records(caplog)
+    assert record.fields["status"] == 400
+    # The error the route flattened into HTTPException(400, str(e)) is kept
+    assert record.exc_info[0].__name__ == "InvalidId"
+
+
+async def test_slow_requests_include_commands(app, client, caplog):
+    from access_log import AccessLogger
+
+    app.state.access_log = AccessLogger(sample_rate=0.0, slow_request_ms=0)
+    with caplog.at_level(logging.INFO, logger="access"):
+        await client.get("/courses")
+
+    [record] = access_records(caplog)
+    assert record.levelno == logging.WARNING
+    assert record.fields["slow"] is True
+    assert record.fields["commands"] == []
+
+
+def test_command_recorder_attributes_commands_to_request():
+    import database
+    from access_log import tracking
+
+    recorder = database.CommandRecorder()
+    with tracking("req-2") as stats:
+        recorder.started(SimpleNamespace(request_id=7, command_name="find", command={"find": "courses"}))
+        recorder.succeeded(SimpleNamespace(request_id=7, duration_micros=1500))
+    # Outside a request nothing is recorded
+    recorder.started(SimpleNamespace(request_id=8, command_name="ping", command={"ping": 1}))
+
+    assert stats.db_ops == 1
+    assert stats.commands == [{"command": "find", "collection": "courses", "durationMs": 1.5}]
+
+
+def test_json_formatter():
+    from access_log import JsonFormatter
+
+    record = logging.LogRecord("access", logging.INFO, __file__, 1, "GET %s", ("/api/courses",), None)
+    record.request_id = "req-3"
+    record.fields = {"status": 200}
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "GET /api/courses"
+    assert entry["requestId"] == "req-3"
+    assert entry["status"] == 200
@@ -0,0 +1,355 @@
+"""
+University Calendar API scenarios, run in-process against an in-memory Mongo.
+
+Covers what the old remote backend_test.py checked, plus concurrent writes
+that race on the course counters.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+COURSE = {
+    "name": "Data Structures",
+    "type": "course",
+    "schedule": [{"day": "Monday", "startTime": "09:00", "endTime": "10:00"}],
+    "minAttendancePercentage": 75,
+    "color": "#4A90E2",
+}
+
+MISSING_ID = "507f1f77bcf86cd799439011"
+
+
+async def create_course(client, **overrides) -> dict:
+    response = await client.post("/courses", json={**COURSE, **overrides})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def mark(client, course_id: str, date: str, status: str = "present"):
+    return await client.post("/attendance", json={"courseId": course_id, "date": date, "status": status})
+
+
+async def test_root_endpoint(client):
+    response = await client.get("/")
+    assert response.status_code == 200
+    assert "message" in response.json()
+
+
+async def test_health_endpoints(client):
+    health = (await client.get("/health")).json()
+    assert health["status"] == "ok"
+    assert {"mongo", "pool", "courseCache"} <= health.keys()
+
+    ready = await client.get("/ready")
+    assert ready.status_code == 200
+    assert ready.json()["ready"] is True
+
+
+async def test_create_course(client):
+    course = await create_course(client)
+    for field in ["id", "name", "type", "schedule", "minAttendancePercentage", "totalClasses", "attendedClasses", "color"]:
+        assert field in course
+    assert course["totalClasses"] == 0
+    assert course["attendedClasses"] == 0
+
+
+async def test_get_all_courses(client):
+    course = await create_course(client)
+    courses = (await client.get("/courses")).json()
+    assert [c["id"] for c in courses] == [course["id"]]
+
+
+async def test_get_single_course(client):
+    course = await create_course(client)
+    response = await client.get(f"/courses/{course['id']}")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Data Structures"
+
+
+async def test_update_course(client):
+    course = await create_course(client)
+    response = await client.put(f"/courses/{course['id']}", json={"name": "Advanced Data Structures", "minAttendancePercentage": 80})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Advanced Data Structures"
+    assert response.json()["minAttendancePercentage"] == 80
+    # The cached copy must not survive the update
+    assert (await client.get(f"/courses/{course['id']}")).json()["name"] == "Advanced Data Structures"
+
+
+async def test_mark_attendance_updates_statistics(client):
+    course = await create_course(client)
+    present = await mark(client, course["id"], "2025-01-13", "present")
+    absent = await mark(client, course["id"], "2025-01-20", "absent")
+    assert present.status_code == 200 and present.json()["status"] == "present"
+    assert absent.status_code == 200 and absent.json()["status"] == "absent"
+
+    stats = (await client.get(f"/courses/{course['id']}")).json()
+    assert (stats["totalClasses"], stats["attendedClasses"]) == (2, 1)
+
+
+async def test_duplicate_attendance_rejected(client):
+    course = await create_course(client)
+    await mark(client, course["id"], "2025-01-13")
+    response = await mark(client, course["id"], "2025-01-13")
+    assert response.status_code == 400
+    assert "already marked" in response.json()["detail"]
+
+
+async def test_get_course_attendance(client):
+    course = await create_course(client)
+    for date in ["2025-01-13", "2025-01-27", "2025-01-20"]:
+        await mark(client, course["id"], date)
+    records = (await client.get(f"/attendance/course/{course['id']}")).json()
+    assert [r["date"] for r in records] == ["2025-01-27", "2025-01-20", "2025-01-13"]
+
+
+async def test_get_all_absences(client):
+    course = await create_course(client)
+    await mark(client, course["id"], "2025-01-13", "present")
+    await mark(client, course["id"], "2025-01-20", "absent")
+    absences = (await client.get("/attendance/absences")).json()
+    assert len(absences) == 1
+    assert absences[0]["courseName"] == "Data Structures"
+    assert absences[0]["courseColor"] == "#4A90E2"
+
+
+async def read_pages(client, url: str, limit: int) -> list:
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append([r["date"] for r in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+async def test_course_attendance_pages(client):
+    course = await create_course(client)
+    dates = [f"2025-01-{day:02d}" for day in range(1, 6)]
+    for date in dates:
+        await mark(client, course["id"], date)
+    pages = await read_pages(client, f"/attendance/course/{course['id']}", limit=2)
+    assert pages == [["2025-01-05", "2025-01-04"], ["2025-01-03", "2025-01-02"], ["2025-01-01"]]
+
+
+async def test_absence_pages_span_courses_and_skip_deleted(client):
+    first, second, deleted = [await create_course(client, name=name) for name in ("A", "B", "C")]
+    for course in (first, second, deleted):
+        for date in ("2025-01-06", "2025-01-13"):
+            await mark(client, course["id"], date, "absent")
+    await client.delete(f"/courses/{deleted['id']}")
+
+    pages = await read_pages(client, "/attendance/absences", limit=3)
+    assert pages == [["2025-01-13"] * 2 + ["2025-01-06"], ["2025-01-06"]]
+    assert (await client.get("/attendance/absences", params={"cursor": "not-a-cursor"})).status_code == 400
+    assert (await client.get("/attendance/absences", params={"limit": 0})).status_code == 422
+
+
+async def test_update_attendance_status(client):
+    course = await create_course(client)
+    record = (await mark(client, course["id"], "2025-01-13", "absent")).json()
+    response = await client.put(f"/attendance/{record['id']}", json={"status": "present"})
+    assert response.status_code == 200
+    assert (await client.get(f"/courses/{course['id']}")).json()["attendedClasses"] == 1
+
+
+async def test_delete_attendance_record(client):
+    course = await create_course(client)
+    record = (await mark(client, course["id"], "2025-01-13", "present")).json()
+    response = await client.delete(f"/attendance/{record['id']}")
+    assert response.status_code == 200
+    stats = (await client.get(f"/courses/{course['id']}")).json()
+    assert (stats["totalClasses"], stats["attendedClasses"]) == (0, 0)
+
+
+async def test_bulk_attendance(client):
+    course = await create_course(client)
+    await mark(client, course["id"], "2025-01-06")
+    response = await client.post("/attendance/bulk", json={
+        "courseId": course["id"],
+        "attendanceList": [{"date": d, "status": "present"} for d in ["2025-01-06", "2025-01-13", "2025-01-20"]],
+    })
+    assert response.json()["created"] == 2
+    assert response.json()["skipped"] == 1
+    assert (await client.get(f"/courses/{course['id']}")).json()["totalClasses"] == 3
+
+
+async def test_delete_and_restore_course(client):
+    course = await create_course(client)
+    await mark(client, course["id"], "2025-01-13", "absent")
+
+    response = await client.delete(f"/courses/{course['id']}")
+    assert response.status_code == 200
+    assert "restorableUntil" in response.json()
+    assert (await client.get("/courses")).json() == []
+    assert (await client.get("/attendance/absences")).json() == []
+
+    response = await client.post(f"/courses/{course['id']}/restore")
+    assert response.status_code == 200
+    assert len((await client.get("/attendance/absences")).json()) == 1
+
+
+async def test_purge_removes_history(app, client):
+    from purge import CoursePurger
+
+    course = await create_course(client)
+    await mark(client, course["id"], "2025-01-13")
+    await client.delete(f"/courses/{course['id']}")
+    # Let the restore window lapse
+    await app.state.db.courses.update_one({"_id": ObjectId(course["id"])}, {"$set": {"purgeAfter": datetime(2000, 1, 1)}})
+
+    assert await CoursePurger(app.state.db, batch_size=1).purge_due() == 1
+    assert await app.state.db.attendance.count_documents({}) == 0
+    assert await app.state.db.rollup_records.count_documents({}) == 0
+    assert await app.state.db.absence_runs.count_documents({}) == 0
+    assert await app.state.db.courses.count_documents({}) == 0
+    assert (await client.post(f"/courses/{course['id']}/restore")).status_code == 404
+
+
+async def test_course_rollup(client):
+    course = await create_course(client)
+    for date, status in [("2025-01-13", "present"), ("2025-01-20", "absent"), ("2025-01-27", "absent")]:
+        await mark(client, course["id"], date, status)
+    rollup = (await client.get(f"/courses/{course['id']}/rollup")).json()
+    assert rollup["total"] == 3
+    assert rollup["byStatus"] == {"present": 1, "absent": 2}
+    assert rollup["byWeekday"] == {"Monday": {"present": 1, "absent": 2}}
+    assert rollup["lastAttendedDate"] == "2025-01-13"
+    assert rollup["currentAbsenceStreak"] == 2
+
+
+async def test_idempotent_create_course(client):
+    headers = {"Idempotency-Key": "create-once"}
+    first = await client.post("/courses", json=COURSE, headers=headers)
+    retry = await client.post("/courses", json=COURSE, headers=headers)
+    assert retry.json()["id"] == first.json()["id"]
+    assert len((await client.get("/courses")).json()) == 1
+
+    reused = await client.post("/courses", json={**COURSE, "name": "Other"}, headers=headers)
+    assert reused.status_code == 422
+
+
+async def claim_for_other_request(app, key: str, age: timedelta):
+    """A pending Idempotency-Key claim held by another request for `age`"""
+    from idempotency import fingerprint
+    from server import CourseCreate
+
+    await app.state.db.idempotency_keys.insert_one({
+        "_id": f"POST /courses:{key}",
+        "fingerprint": fingerprint(CourseCreate(**COURSE).dict()),
+        "state": "pending",
+        "owner": "other-request",
+        "createdAt": datetime.utcnow() - age,
+    })
+
+
+async def test_idempotent_retry_waits_for_slow_original(app, client):
+    await claim_for_other_request(app, "slow", timedelta(seconds=10))
+    response = await client.post("/courses", json=COURSE, headers={"Idempotency-Key": "slow"})
+    assert response.status_code == 409
+    assert (await client.get("/courses")).json() == []
+
+
+async def test_idempotent_retry_takes_over_dead_original(app, client):
+    from idempotency import PENDING_TAKEOVER_AFTER
+
+    await claim_for_other_request(app, "dead", PENDING_TAKEOVER_AFTER + timedelta(seconds=1))
+    response = await client.post("/courses", json=COURSE, headers={"Idempotency-Key": "dead"})
+    assert response.status_code == 200
+    record = await app.state.db.idempotency_keys.find_one({"_id": "POST /courses:dead"})
+    assert record["state"] == "done"
+    assert record["owner"] != "other-request"
+
+
+async def test_rate_limit(app, client):
+    from throttling import RateLimiter, parse_rate_limits
+
+    app.state.rate_limiter = RateLimiter(parse_rate_limits("GET /api/courses=1:2"))
+    statuses = [(await client.get("/courses")).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    assert (await client.get("/health")).status_code == 200
+
+
+@pytest.mark.parametrize("spec", ["GET /api/courses=0:5", "*=-1:5", "*=2:0", "*=0"])
+def test_rate_limit_rejects_limits_that_never_refill(spec):
+    from throttling import parse_rate_limits
+
+    with pytest.raises(ValueError):
+        parse_rate_limits(spec)
+
+
+async def test_error_handling(client):
+    assert (await client.get("/courses/invalid_id")).status_code == 400
+    assert (await client.post("/courses", json={"name": "Test"})).status_code == 422
+    assert (await client.delete(f"/attendance/{MISSING_ID}")).status_code == 404
+    assert (await mark(client, MISSING_ID, "2025-01-13")).status_code == 404
+
+
+async def test_attendance_dates_must_be_iso(client):
+    course = await create_course(client)
+    assert (await mark(client, course["id"], "13/01/2025")).status_code == 422
+    assert (await mark(client, course["id"], "2025-02-30")).status_code == 422
+    response = await client.post("/attendance/bulk", json={
+        "courseId": course["id"],
+        "attendanceList": [{"date": "2025-01-13", "status": "present"}, {"date": "yesterday", "status": "absent"}],
+    })
+    assert response.status_code == 422
+    assert (await client.get(f"/attendance/course/{course['id']}")).json() == []
+
+
+# Concurrent writes: the counters must match the attendance records exactly
+
+async def assert_counters_consistent(client, course_id: str):
+    records = (await client.get(f"/attendance/course/{course_id}")).json()
+    course = (await client.get(f"/courses/{course_id}")).json()
+    assert course["totalClasses"] == len(records)
+    assert course["attendedClasses"] == sum(r["status"] == "present" for r in records)
+
+
+async def test_concurrent_marking_distinct_dates(client):
+    course = await create_course(client)
+    dates = [f"2025-02-{day:02d}" for day in range(1, 21)]
+    responses = await asyncio.gather(*(mark(client, course["id"], d, "present" if i % 2 else "absent") for i, d in enumerate(dates)))
+    assert all(r.status_code == 200 for r in responses)
+    await assert_counters_consistent(client, course["id"])
+    assert (await client.get(f"/courses/{course['id']}/rollup")).json()["total"] == len(dates)
+
+
+async def test_concurrent_marking_same_date(client):
+    course = await create_course(client)
+    responses = await asyncio.gather(*(mark(client, course["id"], "2025-03-03") for _ in range(10)))
+    assert sorted(r.status_code for r in responses) == [200] + [400] * 9
+    await assert_counters_consistent(client, course["id"])
+
+
+async def test_concurrent_bulk_overlap(client):
+    course = await create_course(client)
+    batch = {"courseId": course["id"], "attendanceList": [{"date": f"2025-04-{d:02d}", "status": "present"} for d in range(1, 11)]}
+    responses = await asyncio.gather(*(client.post("/attendance/bulk", json=batch) for _ in range(4)))
+    assert sum(r.json()["created"] for r in responses) == 10
+    await assert_counters_consistent(client, course["id"])
+
+
+async def test_concurrent_status_toggles(client):
+    course = await create_course(client)
+    record = (await mark(client, course["id"], "2025-05-05", "present")).json()
+    await asyncio.gather(*(
+        client.put(f"/attendance/{record['id']}", json={"status": "absent" if i % 2 else "present"})
+        for i in range(10)
+    ))
+    await assert_counters_consistent(client, course["id"])
+
+
+async def test_concurrent_deletes(client):
+    course = await create_course(client)
+    record = (await mark(client, course["id"], "2025-06-02", "present")).json()
+    responses = await asyncio.gather(*(client.delete(f"/attendance/{record['id']}") for _ in range(5)))
+    assert sorted(r.status_code for r in responses) == [200] + [404] * 4
+    await assert_counters_consistent(client, course["id"])
@@ -0,0 +1,195 @@
+"""
+Per-endpoint benchmarks, run in-process against an in-memory Mongo.
+
+Record a baseline once, then fail when an endpoint gets slower:
+
+    pytest tests/test_benchmarks.py --benchmark-autosave
+    pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:25%
+
+The in-memory store has no network or disk cost, so these measure what the
+app itself spends per request: routing, validation, caching and serialisation.
+"""
+
+import asyncio
+import contextlib
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from .test_api import COURSE  # noqa: E402
+
+# Seeded history, so list endpoints serialise a realistic amount of data
+SEEDED_DAYS = 60
+
+# For writes that need fresh state per round, set up by benchmark.pedantic
+PEDANTIC_ROUNDS = 50
+
+
+class Harness:
+    """Drives the app from synchronous benchmark callbacks on its own loop"""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        self._stack = None
+        self.client = None
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    async def _open(self):
+        import httpx
+
+        self._stack = contextlib.AsyncExitStack()
+        await self._stack.enter_async_context(self.app.router.lifespan_context(self.app))
+        self.client = await self._stack.enter_async_context(
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test/api")
+        )
+
+    def open(self):
+        self.run(self._open())
+
+    def close(self):
+        self.run(self._stack.aclose())
+        self.loop.close()
+
+    def request(self, method: str, url: str, **kwargs):
+        response = self.run(self.client.request(method, url, **kwargs))
+        assert response.status_code < 400, response.text
+        return response.json()
+
+
+@pytest.fixture
+def harness(app):
+    harness = Harness(app)
+    harness.open()
+    yield harness
+    harness.close()
+
+
+@pytest.fixture
+def course(harness):
+    course = harness.request("POST", "/courses", json=COURSE)
+    start = date(2025, 1, 6)
+    harness.request("POST", "/attendance/bulk", json={
+        "courseId": course["id"],
+        "attendanceList": [
+            {"date": (start + timedelta(days=day)).isoformat(), "status": "absent" if day % 3 else "present"}
+            for day in range(SEEDED_DAYS)
+        ],
+    })
+    return course
+
+
+def test_root(benchmark, harness):
+    benchmark(harness.request, "GET", "/")
+
+
+def test_health(benchmark, harness):
+    benchmark(harness.request, "GET", "/health")
+
+
+def test_ready(benchmark, harness):
+    benchmark(harness.request, "GET", "/ready")
+
+
+def test_list_courses(benchmark, harness, course):
+    benchmark(harness.request, "GET", "/courses")
+
+
+def test_get_course(benchmark, harness, course):
+    benchmark(harness.request, "GET", f"/courses/{course['id']}")
+
+
+def test_course_rollup(benchmark, harness, course):
+    benchmark(harness.request, "GET", f"/courses/{course['id']}/rollup")
+
+
+def test_course_attendance(benchmark, harness, course):
+    benchmark(harness.request, "GET", f"/attendance/course/{course['id']}")
+
+
+def test_absences(benchmark, harness, course):
+    benchmark(harness.request, "GET", "/attendance/absences")
+
+
+def test_create_course(benchmark, harness):
+    benchmark(harness.request, "POST", "/courses", json=COURSE)
+
+
+def test_update_course(benchmark, harness, course):
+    benchmark(harness.request, "PUT", f"/courses/{course['id']}", json={"minAttendancePercentage": 80})
+
+
+def test_mark_attendance(benchmark, harness, course):
+    # Each round needs a date that has not been marked yet
+    days = itertools.count(SEEDED_DAYS)
+    start = date(2025, 1, 6)
+
+    def mark():
+        day = (start + timedelta(days=next(days))).isoformat()
+        return harness.request("POST", "/attendance", json={"courseId": course["id"], "date": day, "status": "present"})
+
+    benchmark(mark)
+
+
+def test_bulk_attendance(benchmark, harness, course):
+    # A week of dates that have not been marked yet, per round
+    weeks = itertools.count()
+    start = date(2025, 1, 6) + timedelta(days=SEEDED_DAYS)
+
+    def mark_week():
+        first = start + timedelta(weeks=next(weeks))
+        return harness.request("POST", "/attendance/bulk", json={
+            "courseId": course["id"],
+            "attendanceList": [
+                {"date": (first + timedelta(days=day)).isoformat(), "status": "present"} for day in range(7)
+            ],
+        })
+
+    benchmark(mark_week)
+
+
+def test_update_attendance(benchmark, harness, course):
+    record = harness.request("GET", f"/attendance/course/{course['id']}")[0]
+    statuses = itertools.cycle(["present", "absent"])
+    benchmark(lambda: harness.request("PUT", f"/attendance/{record['id']}", json={"status": next(statuses)}))
+
+
+def test_course_attendance_page(benchmark, harness, course):
+    benchmark(harness.request, "GET", f"/attendance/course/{course['id']}", params={"limit": 20})
+
+
+def test_absences_page(benchmark, harness, course):
+    benchmark(harness.request, "GET", "/attendance/absences", params={"limit": 20})
+
+
+def test_delete_attendance(benchmark, harness, course):
+    days = itertools.count(SEEDED_DAYS)
+    start = date(2025, 1, 6)
+
+    def setup():
+        day = (start + timedelta(days=next(days))).isoformat()
+        record = harness.request("POST", "/attendance", json={"courseId": course["id"], "date": day, "status": "present"})
+        return ("DELETE", f"/attendance/{record['id']}"), {}
+
+    benchmark.pedantic(harness.request, setup=setup, rounds=PEDANTIC_ROUNDS)
+
+
+def test_delete_course(benchmark, harness):
+    def setup():
+        course = harness.request("POST", "/courses", json=COURSE)
+        return ("DELETE", f"/courses/{course['id']}"), {}
+
+    benchmark.pedantic(harness.request, setup=setup, rounds=PEDANTIC_ROUNDS)
+
+
+def test_restore_course(benchmark, harness, course):
+    def setup():
+        harness.request("DELETE", f"/courses/{course['id']}")
+        return ("POST", f"/courses/{course['id']}/restore"), {}
+
+    benchmark.pedantic(harness.request, setup=setup, rounds=PEDANTIC_ROUNDS)
@@ -0,0 +1,72 @@
+"""Cache invalidation decisions for change stream events."""
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+
+@pytest.fixture
+def invalidator():
+    from change_streams import CacheInvalidator
+    from course_cache import CourseCache
+
+    cache = CourseCache(enabled=True)
+    cache.put({"id": "c1", "name": "A"}, cache.generation)
+    cache.put({"id": "c2", "name": "B"}, cache.generation)
+    return CacheInvalidator(db=None, cache=cache)
+
+
+def test_attendance_insert_invalidates_its_course(invalidator):
+    invalidator.apply({"operationType": "insert", "ns": {"coll": "attendance"}, "fullDocument": {"courseId": "c1"}})
+    assert invalidator.cache.get("c1") is None
+    assert invalidator.cache.get("c2") is not None
+
+
+def test_attendance_delete_keeps_the_cache(invalidator):
+    # The matching `courses` event does the invalidation
+    invalidator.apply({"operationType": "delete", "ns": {"coll": "attendance"}, "documentKey": {"_id": "a1"}})
+    assert invalidator.cache.get("c1") is not None
+    assert invalidator.cache.get("c2") is not None
+
+
+def test_course_change_invalidates_that_course(invalidator):
+    invalidator.apply({"operationType": "update", "ns": {"coll": "courses"}, "documentKey": {"_id": "c2"}})
+    assert invalidator.cache.get("c1") is not None
+    assert invalidator.cache.get("c2") is None
+
+
+class StandaloneDb:
+    """A mongod without change streams"""
+
+    def watch(self, *args, **kwargs):
+        from pymongo.errors import OperationFailure
+
+        raise OperationFailure("$changeStream is only supported on replica sets", code=40573)
+
+
+@pytest.mark.anyio
+async def test_start_fails_without_change_streams():
+    from change_streams import CacheInvalidator
+    from course_cache import CourseCache
+
+    with pytest.raises(RuntimeError, match="replica set"):
+        await CacheInvalidator(StandaloneDb(), CourseCache(enabled=True)).start()
+
+
+@pytest.mark.anyio
+async def test_run_stops_retrying_without_change_streams():
+    from change_streams import CacheInvalidator
+    from course_cache import CourseCache
+
+    invalidator = CacheInvalidator(StandaloneDb(), CourseCache(enabled=True), retry_delay_s=0)
+    await invalidator._run()
+    assert invalidator.cache.enabled is False
+
+
+def test_local_cache_refused_with_several_workers(settings):
+    import dataclasses
+
+    import server
+
+    with pytest.raises(ValueError, match="COURSE_CACHE=local"):
+        server.create_app(dataclasses.replace(settings, course_cache="local", web_concurrency=4))
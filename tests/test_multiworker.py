@@ -0,0 +1,150 @@
+"""
+Cross-worker cache consistency with COURSE_CACHE=watch.
+
+Starts several `uvicorn server:app` processes against a single-node replica
+set and checks that concurrent writes through any worker become visible in
+every worker's cached course reads. The replica set comes from
+MONGO_REPLSET_URL, or is started here when `mongod` is on the PATH; otherwise
+the test is skipped.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+WORKER_COUNT = 3
+CONSISTENCY_TIMEOUT_S = 10.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until(predicate, timeout_s: float, message: str):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return
+        except Exception:
+            pass
+        time.sleep(0.1)
+    pytest.fail(message)
+
+
+@pytest.fixture(scope="module")
+def replica_set_url(tmp_path_factory):
+    url = os.environ.get("MONGO_REPLSET_URL")
+    if url:
+        yield url
+        return
+
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        pytest.skip("needs MONGO_REPLSET_URL or a mongod binary on the PATH")
+    pymongo = pytest.importorskip("pymongo")
+
+    port = free_port()
+    process = subprocess.Popen(
+        [mongod, "--replSet", "rs0", "--port", str(port), "--bind_ip", "127.0.0.1",
+         "--dbpath", str(tmp_path_factory.mktemp("mongod"))],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        admin = pymongo.MongoClient(f"mongodb://127.0.0.1:{port}/?directConnection=true").admin
+        wait_until(lambda: admin.command("ping"), 30, "mongod did not start")
+        admin.command("replSetInitiate", {"_id": "rs0", "members": [{"_id": 0, "host": f"127.0.0.1:{port}"}]})
+        wait_until(lambda: admin.command("hello").get("isWritablePrimary"), 30, "replica set has no primary")
+        yield f"mongodb://127.0.0.1:{port}/?replicaSet=rs0"
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+@pytest.fixture(scope="module")
+def workers(replica_set_url):
+    """Base URLs of the running workers, each with its own course cache"""
+    env = dict(os.environ, MONGO_URL=replica_set_url, DB_NAME=f"calendar_test_{uuid.uuid4().hex[:8]}",
+               COURSE_CACHE="watch")
+    processes, urls = [], []
+    try:
+        for _ in range(WORKER_COUNT):
+            port = free_port()
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port)],
+                cwd=BACKEND_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            ))
+            urls.append(f"http://127.0.0.1:{port}/api")
+        for url in urls:
+            wait_until(lambda: requests.get(f"{url}/ready").status_code == 200, 30, f"{url} never became ready")
+        yield urls
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def test_concurrent_writes_reach_every_worker(workers):
+    course = requests.post(f"{workers[0]}/courses", json={
+        "name": "Distributed Systems",
+        "type": "course",
+        "schedule": [{"day": "Monday", "startTime": "09:00", "endTime": "10:00"}],
+        "minAttendancePercentage": 75,
+    }).json()
+    course_id = course["id"]
+
+    # Warm every worker's cache with the initial state
+    for url in workers:
+        assert requests.get(f"{url}/courses/{course_id}").json()["totalClasses"] == 0
+        assert any(c["id"] == course_id for c in requests.get(f"{url}/courses").json())
+
+    # Mark attendance concurrently, spreading the writes over all workers
+    dates = [f"2025-02-{day:02d}" for day in range(1, 25)]
+
+    def mark(index):
+        url = workers[index % len(workers)]
+        status = "present" if index % 3 else "absent"
+        response = requests.post(f"{url}/attendance", json={"courseId": course_id, "date": dates[index], "status": status})
+        assert response.status_code == 200, response.text
+        return status
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(mark, range(len(dates))))
+    attended = statuses.count("present")
+
+    def consistent(url):
+        single = requests.get(f"{url}/courses/{course_id}").json()
+        listed = next(c for c in requests.get(f"{url}/courses").json() if c["id"] == course_id)
+        return all(c["totalClasses"] == len(dates) and c["attendedClasses"] == attended for c in (single, listed))
+
+    for url in workers:
+        wait_until(lambda: consistent(url), CONSISTENCY_TIMEOUT_S, f"{url} kept serving stale counters")
+
+    # A rename through the last worker must reach the others' caches too
+    requests.put(f"{workers[-1]}/courses/{course_id}", json={"name": "Distributed Systems II"})
+    for url in workers:
+        wait_until(lambda: requests.get(f"{url}/courses/{course_id}").json()["name"] == "Distributed Systems II",
+                   CONSISTENCY_TIMEOUT_S, f"{url} kept serving the old course name")
+
+    # And a delete must remove it everywhere
+    requests.delete(f"{workers[1]}/courses/{course_id}")
+    for url in workers:
+        wait_until(lambda: all(c["id"] != course_id for c in requests.get(f"{url}/courses").json()),
+                   CONSISTENCY_TIMEOUT_S, f"{url} still lists the deleted course")
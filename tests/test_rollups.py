@@ -0,0 +1,240 @@
+"""Rollups folded from attendance events, rebuilt from the log and backfilled."""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from bson import ObjectId
+
+from .test_api import create_course, mark
+
+pytestmark = pytest.mark.anyio
+
+# Consecutive Mondays
+DATES = ["2025-01-06", "2025-01-13", "2025-01-20", "2025-01-27", "2025-02-03"]
+
+
+async def new_course(client) -> str:
+    return (await create_course(client))["id"]
+
+
+async def mark_id(client, course_id: str, date: str, status: str = "present") -> str:
+    response = await mark(client, course_id, date, status)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def rollup(client, course_id: str) -> dict:
+    return (await client.get(f"/courses/{course_id}/rollup")).json()
+
+
+async def test_updates_and_deletes(client):
+    course_id = await new_course(client)
+    ids = [await mark_id(client, course_id, date, status) for date, status in zip(DATES, ["absent", "absent", "present", "absent", "absent"])]
+    assert (await rollup(client, course_id))["longestAbsenceStreak"] == 2
+
+    # Breaking the first run and joining the other two
+    await client.put(f"/attendance/{ids[0]}", json={"status": "present"})
+    await client.put(f"/attendance/{ids[2]}", json={"status": "absent"})
+    figures = await rollup(client, course_id)
+    assert figures["byStatus"] == {"present": 1, "absent": 4}
+    assert figures["lastAttendedDate"] == DATES[0]
+    assert (figures["currentAbsenceStreak"], figures["longestAbsenceStreak"]) == (4, 4)
+
+    await client.delete(f"/attendance/{ids[0]}")
+    await client.delete(f"/attendance/{ids[4]}")
+    figures = await rollup(client, course_id)
+    assert figures["total"] == 3
+    assert figures["byStatus"] == {"absent": 3}
+    assert figures["weekly"] == {"2025-W03": {"absent": 1}, "2025-W04": {"absent": 1}, "2025-W05": {"absent": 1}}
+    assert figures["lastAttendedDate"] is None
+    assert (figures["currentAbsenceStreak"], figures["longestAbsenceStreak"]) == (3, 3)
+
+
+async def test_marking_an_earlier_date(client):
+    course_id = await new_course(client)
+    await mark_id(client, course_id, DATES[1], "absent")
+    await mark_id(client, course_id, DATES[3], "absent")
+    await mark_id(client, course_id, DATES[2], "absent")
+    await mark_id(client, course_id, DATES[0], "present")
+    figures = await rollup(client, course_id)
+    assert figures["lastAttendedDate"] == DATES[0]
+    assert (figures["currentAbsenceStreak"], figures["longestAbsenceStreak"]) == (3, 3)
+
+
+async def test_rebuild_matches_live_rollup(app, client):
+    course_id = await new_course(client)
+    ids = [await mark_id(client, course_id, date, "absent") for date in DATES]
+    await client.put(f"/attendance/{ids[1]}", json={"status": "present"})
+    await client.delete(f"/attendance/{ids[3]}")
+    live = await rollup(client, course_id)
+
+    assert await app.state.events.rebuild() == 1
+    assert await rollup(client, course_id) == live
+    assert live["total"] == 4
+
+
+async def test_backfill_courses_with_some_events(app, client):
+    course_id = await new_course(client)
+    # Recorded before the pipeline existed: no events
+    await app.state.db.attendance.insert_many([
+        {"courseId": ObjectId(course_id), "date": day, "status": "present"}
+        for day in DATES[:3]
+    ])
+    await mark_id(client, course_id, DATES[3], "absent")
+
+    events = app.state.events
+    assert await events.backfill() == 3
+    assert await events.backfill() == 0
+    await events.rebuild()
+    figures = await rollup(client, course_id)
+    assert figures["total"] == 4
+    assert figures["byStatus"] == {"present": 3, "absent": 1}
+    assert figures["lastAttendedDate"] == DATES[2]
+
+
+async def test_backfill_logs_changes_whose_events_were_lost(app, client):
+    course_id = await new_course(client)
+    ids = [await mark_id(client, course_id, date, "absent") for date in DATES[:4]]
+    db = app.state.db
+    # Written to attendance, but the events never made it to the log
+    await db.attendance.update_one({"_id": ObjectId(ids[1])}, {"$set": {"status": "present"}})
+    await db.attendance.delete_one({"_id": ObjectId(ids[3])})
+    await db.attendance.insert_one({"courseId": ObjectId(course_id), "date": DATES[4], "status": "absent"})
+
+    events = app.state.events
+    assert await events.backfill() == 3
+    assert await events.backfill() == 0
+    await events.rebuild()
+    figures = await rollup(client, course_id)
+    assert figures["byStatus"] == {"present": 1, "absent": 3}
+    assert figures["lastAttendedDate"] == DATES[1]
+    assert (figures["currentAbsenceStreak"], figures["longestAbsenceStreak"]) == (2, 2)
+
+
+async def test_update_for_unlogged_record_is_counted(app, client):
+    from rollups import UPDATED, attendance_event
+
+    course_id = await new_course(client)
+    record = {"_id": ObjectId(), "courseId": ObjectId(course_id), "date": DATES[0], "status": "present"}
+    await app.state.events.emit(attendance_event(UPDATED, record, previous_status="absent"))
+    figures = await rollup(client, course_id)
+    assert (figures["total"], figures["byStatus"]) == (1, {"present": 1})
+
+
+async def test_late_events_for_deleted_records_are_ignored(app, client):
+    from rollups import DELETED, UPDATED, attendance_event
+
+    course_id = await new_course(client)
+    record = {"_id": ObjectId(), "courseId": ObjectId(course_id), "date": DATES[0], "status": "present"}
+    await app.state.events.emit(attendance_event(DELETED, record))
+    await app.state.events.emit(attendance_event(UPDATED, record))
+    assert (await rollup(client, course_id))["total"] == 0
+
+
+def expected_streaks(records: dict):
+    """Streak figures recomputed from scratch, for comparison"""
+    current = longest = 0
+    for day in sorted(records):
+        current = current + 1 if records[day]["status"] == "absent" else 0
+        longest = max(longest, current)
+    attended = [day for day in sorted(records) if records[day]["status"] == "present"]
+    return attended[-1] if attended else None, current, longest
+
+
+async def test_random_changes_keep_streaks_exact(app, client):
+    from rollups import CREATED, DELETED, UPDATED, attendance_event
+
+    course_id = await new_course(client)
+    rng = random.Random(32)
+    days = [(date(2025, 1, 6) + timedelta(days=i)).isoformat() for i in range(40)]
+    records = {}
+    for _ in range(200):
+        day = rng.choice(days)
+        status = rng.choice(["absent", "absent", "present", "excused"])
+        if day not in records:
+            records[day] = {"_id": ObjectId(), "courseId": ObjectId(course_id), "date": day, "status": status}
+            event = attendance_event(CREATED, records[day])
+        elif rng.random() < 0.3:
+            event = attendance_event(DELETED, records.pop(day))
+        else:
+            records[day] = {**records[day], "status": status}
+            event = attendance_event(UPDATED, records[day])
+        await app.state.events.emit(event)
+
+        figures = await rollup(client, course_id)
+        assert figures["total"] == len(records)
+        assert (figures["lastAttendedDate"], figures["currentAbsenceStreak"], figures["longestAbsenceStreak"]) \
+            == expected_streaks(records)
+
+
+async def test_invalid_dates_are_skipped_not_half_applied(app, client):
+    from rollups import CREATED, attendance_event
+
+    course_id = await new_course(client)
+    bad = {"_id": ObjectId(), "courseId": ObjectId(course_id), "date": "13/01/2025", "status": "absent"}
+    await app.state.events.emit(attendance_event(CREATED, bad))
+    await mark_id(client, course_id, "2025-01-14", "absent")
+    figures = await rollup(client, course_id)
+    assert (figures["total"], figures["currentAbsenceStreak"]) == (1, 1)
+
+    # A bad event in the log does not stop the rebuild of any course
+    other_id = await new_course(client)
+    await mark_id(client, other_id, "2025-01-14")
+    assert await app.state.events.rebuild() == 2
+    assert (await rollup(client, course_id))["total"] == 1
+    assert (await rollup(client, other_id))["total"] == 1
+
+
+class CountingDb:
+    """Database proxy counting the operations issued through it"""
+
+    def __init__(self, db, ops: list):
+        self._db, self._ops = db, ops
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._db, name), self._ops)
+
+
+class CountingCollection:
+    def __init__(self, collection, ops: list):
+        self._collection, self._ops = collection, ops
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        def counted(*args, **kwargs):
+            self._ops.append(name)
+            return method(*args, **kwargs)
+
+        return counted
+
+
+async def test_fold_cost_does_not_grow_with_history(app, client):
+    from rollups import CREATED, DELETED, UPDATED, EventPipeline, attendance_event
+
+    async def ops_for(*events) -> int:
+        ops = []
+        await EventPipeline(CountingDb(app.state.db, ops)).emit(*events)
+        return len(ops)
+
+    def absences(course_id, start: int, count: int) -> list:
+        return [
+            {"_id": ObjectId(), "courseId": course_id, "date": (date(2000, 1, 3) + timedelta(days=i)).isoformat(), "status": "absent"}
+            for i in range(start, start + count)
+        ]
+
+    costs = []
+    for size in (20, 400):
+        course_id = ObjectId(await new_course(client))
+        history = absences(course_id, 0, size)
+        await app.state.events.emit(*(attendance_event(CREATED, record) for record in history))
+        middle = {**history[size // 2], "status": "present"}
+        costs.append((
+            await ops_for(*(attendance_event(CREATED, record) for record in absences(course_id, size, 10))),
+            await ops_for(attendance_event(UPDATED, middle, previous_status="absent")),
+            await ops_for(attendance_event(DELETED, middle)),
+        ))
+        figures = await rollup(client, str(course_id))
+        assert (figures["total"], figures["longestAbsenceStreak"]) == (size + 9, size + 9)
+    assert costs[0] == costs[1]